@@ -0,0 +1,83 @@
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.codec import CODEC_JSON, CODEC_ZLIB, CODEC_ZSTD, decode_payload, encode_payload, zstandard
+from fakes import MessageFactory
+
+CODEC_NAMES = {CODEC_JSON: "json", CODEC_ZLIB: "zlib", CODEC_ZSTD: "zstd"}
+
+
+def collect_payloads(size: int, seed: int) -> Dict[str, List]:
+    payloads = {"embeds": [], "attachments": [], "components": []}
+    for record in MessageFactory(seed).records(size):
+        for kind, values in payloads.items():
+            if record[kind]:
+                values.append(record[kind])
+    return payloads
+
+
+def disk_size(directory: str, codec: int, encoded: Dict[str, List]) -> int:
+    path = os.path.join(directory, f"codec_{codec}.db")
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE payloads (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, data)")
+        with conn:
+            conn.executemany(
+                "INSERT INTO payloads (kind, data) VALUES (?, ?)",
+                ((kind, data) for kind, values in encoded.items() for data in values)
+            )
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return os.path.getsize(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rozmiar na dysku i czas dekodowania ładunków w zależności od kodeka")
+    parser.add_argument("--size", type=int, default=20_000, help="liczba wygenerowanych wiadomości")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    codecs = [CODEC_JSON, CODEC_ZLIB] + ([CODEC_ZSTD] if zstandard is not None else [])
+    payloads = collect_payloads(args.size, args.seed)
+    print(f"# {args.size} wiadomości: " + ", ".join(f"{kind} {len(values)}" for kind, values in payloads.items()))
+    if zstandard is None:
+        print("# pominięto zstd: brak pakietu zstandard")
+
+    print(f"{'kodek':<6} {'ładunek':<12} {'śr. bajty':>10} {'kodowanie µs':>13} {'dekodowanie µs':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = {}
+        for codec in codecs:
+            encoded = {}
+            for kind, values in payloads.items():
+                start = time.perf_counter()
+                encoded[kind] = [encode_payload(value, codec) for value in values]
+                encode_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for data in encoded[kind]:
+                    decode_payload(data, codec)
+                decode_time = time.perf_counter() - start
+
+                count = max(len(values), 1)
+                average = sum(len(data) for data in encoded[kind]) / count
+                print(
+                    f"{CODEC_NAMES[codec]:<6} {kind:<12} {average:>10.0f} "
+                    f"{encode_time / count * 1e6:>13.1f} {decode_time / count * 1e6:>15.1f}"
+                )
+            sizes[codec] = disk_size(directory, codec, encoded)
+
+        for codec in codecs:
+            print(f"# {CODEC_NAMES[codec]}: plik bazy {sizes[codec] / 2 ** 20:.2f} MiB "
+                  f"({sizes[codec] / sizes[CODEC_JSON]:.0%} rozmiaru json)")
+
+
+if __name__ == "__main__":
+    main()
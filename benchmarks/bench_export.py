@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.export import bookmark_record
+from database.manager import SELECT_BOOKMARKS, DatabaseManager
+from database.models import Bookmark
+
+USER_ID = 1
+
+
+def synthetic_records(count: int) -> Iterator[Dict[str, Any]]:
+    for i in range(count):
+        yield {
+            "message_id": 1_000_000 + i,
+            "channel_id": 100 + i % 50,
+            "guild_id": 10 + i % 5,
+            "content": f"Wiadomość numer {i} " + "lorem ipsum dolor sit amet " * (i % 8),
+            "embeds": [{"title": f"Osadzenie {i}", "description": "opis " * 30}] if i % 3 == 0 else None,
+            "author_name": f"Autor {i % 200}",
+            "author_avatar": "https://cdn.discordapp.com/avatars/1/a.png",
+            "timestamp": "2024-01-01T12:00:00+00:00",
+            "attachments": [{"url": f"https://cdn.discordapp.com/attachments/1/{i}/p.png", "filename": "p.png", "is_image": True}] if i % 4 == 0 else None,
+            "components": [{"type": 17, "components": [{"type": 10, "content": f"Tekst {i}"}]}] if i % 5 == 0 else None,
+            "message_flags": 32768 if i % 5 == 0 else 0
+        }
+
+
+def materialized_export(db: DatabaseManager, path: str) -> int:
+    conn = db._connect()
+    try:
+        rows = conn.execute(f"{SELECT_BOOKMARKS} WHERE b.user_id = ? ORDER BY b.id", (USER_ID,)).fetchall()
+    finally:
+        conn.close()
+    records = [bookmark_record(Bookmark.from_row(row)) for row in rows]
+    with gzip.open(path, "wt", encoding="utf-8") as stream:
+        stream.write("\n".join(json.dumps(record, separators=(",", ":"), ensure_ascii=False) for record in records))
+    return len(records)
+
+
+async def streaming_export(db: DatabaseManager, path: str) -> int:
+    with open(path, "wb") as fp:
+        return await db.export_bookmarks(USER_ID, fp)
+
+
+def report(label: str, count: int, elapsed: float, peak: int, path: str) -> None:
+    print(f"{label:<14} {count} rekordów  {elapsed:6.2f} s  szczyt {peak / 2 ** 20:7.1f} MiB  plik {os.path.getsize(path) / 2 ** 20:6.1f} MiB")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Pomiar pamięci eksportu zakładek")
+    parser.add_argument("--size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "bench.db"))
+        try:
+            start = time.perf_counter()
+            imported = await db.import_bookmarks(USER_ID, synthetic_records(args.size))
+            print(f"Zasiano {imported} zakładek w {time.perf_counter() - start:.1f} s")
+
+            path = os.path.join(directory, "export.jsonl.gz")
+
+            # Czas mierzony jest osobnym przebiegiem, bo tracemalloc kilkukrotnie spowalnia serializację.
+            start = time.perf_counter()
+            count = await streaming_export(db, path)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            await streaming_export(db, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            report("strumieniowo", count, elapsed, peak, path)
+
+            start = time.perf_counter()
+            count = materialized_export(db, path)
+            elapsed = time.perf_counter() - start
+            tracemalloc.start()
+            materialized_export(db, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            report("w pamięci", count, elapsed, peak, path)
+        finally:
+            await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
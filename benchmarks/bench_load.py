@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cogs.bookmarks import BookmarksCog
+from database.manager import DatabaseManager
+from fakes import FakeBot, FakeInteraction, FakeUser, MessageFactory
+from utils.metrics import metrics
+from utils.ratelimit import RateLimit, RateLimiter
+
+UNLIMITED = RateLimit(1e12, 1)
+
+OPERATIONS = ("save", "list", "detail", "delete")
+
+OPERATION_METRICS = {
+    "save": "menu:save_message",
+    "list": "/bookmarks",
+    "detail": "/bookmark",
+    "delete": "/delete_bookmark"
+}
+
+
+class LoadScenario:
+    def __init__(self, directory: str, size: int, seed: int):
+        self.size = size
+        self.random = random.Random(seed)
+        self.factory = MessageFactory(seed)
+        self.db_manager = DatabaseManager(os.path.join(directory, f"load_{size}.db"))
+        self.bot = FakeBot()
+        self.cog = BookmarksCog(self.bot, self.db_manager)
+        self.cog.rate_limiters = {action: RateLimiter(UNLIMITED, UNLIMITED, UNLIMITED) for action in self.cog.rate_limiters}
+        self.bot.cogs["BookmarksCog"] = self.cog
+        self.users: List[FakeUser] = []
+        self.user_weights: List[float] = []
+        self.bookmark_ids: Dict[int, List[int]] = {}
+
+    async def seed(self) -> None:
+        # Kolekcje użytkowników mają rozkład zbliżony do Zipfa: kilku zbieraczy i długi ogon.
+        user_count = max(10, self.size // 500)
+        weights = [1 / rank for rank in range(1, user_count + 1)]
+        scale = self.size / sum(weights)
+        remaining = self.size
+        for index, weight in enumerate(weights):
+            count = remaining if index == user_count - 1 else min(remaining, max(1, round(weight * scale)))
+            user = FakeUser(1_000 + index, f"Zbieracz {index}")
+            if count:
+                await self.db_manager.import_bookmarks(user.id, self.factory.records(count))
+            remaining -= count
+            self.users.append(user)
+            self.user_weights.append(weight)
+
+        rows = await self.db_manager._run_read(lambda conn: conn.execute("SELECT user_id, id FROM bookmarks").fetchall())
+        for user_id, bookmark_id in rows:
+            self.bookmark_ids.setdefault(user_id, []).append(bookmark_id)
+
+    def interaction(self) -> FakeInteraction:
+        user = self.random.choices(self.users, self.user_weights)[0]
+        guild = self.random.choice(self.factory.guilds)
+        return FakeInteraction(self.bot, user, guild)
+
+    async def save(self) -> None:
+        await self.cog.save_message_context_menu(self.interaction(), self.factory.message())
+
+    async def list(self) -> None:
+        interaction = self.interaction()
+        pages = max(1, (len(self.bookmark_ids.get(interaction.user.id, ())) + 9) // 10)
+        page = 1 if self.random.random() < 0.6 else self.random.randint(1, pages)
+        await self.cog.bookmarks_command.callback(self.cog, interaction, page)
+
+    async def detail(self) -> None:
+        interaction = self.interaction()
+        ids = self.bookmark_ids.get(interaction.user.id)
+        await self.cog.bookmark_command.callback(self.cog, interaction, self.random.choice(ids) if ids else 0)
+
+    async def delete(self) -> None:
+        interaction = self.interaction()
+        ids = self.bookmark_ids.get(interaction.user.id)
+        bookmark_id = ids.pop(self.random.randrange(len(ids))) if ids else 0
+        await self.cog.delete_bookmark_command.callback(self.cog, interaction, bookmark_id)
+
+    async def close(self) -> None:
+        await self.cog.cog_unload()
+
+
+async def drive(operation: Callable, total: int, concurrency: int) -> Tuple[float, List[float]]:
+    latencies: List[float] = []
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1] if len(values) > 1 else values[0]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Test obciążeniowy BookmarksCog na atrapach interakcji Discorda")
+    parser.add_argument("--sizes", default="1000,10000", help="rozmiary bazy oddzielone przecinkami")
+    parser.add_argument("--concurrency", default="1,8,32", help="poziomy współbieżności oddzielone przecinkami")
+    parser.add_argument("--ops", type=int, default=400, help="liczba operacji na pomiar")
+    parser.add_argument("--operations", default=",".join(OPERATIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    operations = [operation for operation in args.operations.split(",") if operation in OPERATIONS]
+
+    print(f"{'rozmiar':>8} {'wsp.':>5} {'operacja':<8} {'op/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db p50':>8} {'render p50':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            scenario = LoadScenario(directory, size, args.seed)
+            start = time.perf_counter()
+            await scenario.seed()
+            print(f"# zasiano {size} zakładek dla {len(scenario.users)} użytkowników w {time.perf_counter() - start:.1f} s")
+            try:
+                for concurrency in levels:
+                    for operation in operations:
+                        metrics.histograms.clear()
+                        elapsed, latencies = await drive(getattr(scenario, operation), args.ops, concurrency)
+                        phases = metrics.summary().get(OPERATION_METRICS[operation], {})
+                        db_p50 = phases.get("db", (0, 0.0))[1] * 1000
+                        render_p50 = phases.get("render", (0, 0.0))[1] * 1000
+                        print(
+                            f"{size:>8} {concurrency:>5} {operation:<8} {len(latencies) / elapsed:>9.0f} "
+                            f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 95) * 1000:>8.2f} "
+                            f"{percentile(latencies, 99) * 1000:>8.2f} {db_p50:>8.2f} {render_p50:>11.2f}"
+                        )
+            finally:
+                await scenario.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.codec import DEFAULT_CODEC, encode_payload
+from database.manager import SELECT_BOOKMARKS
+from database.models import Bookmark
+from ui.components import BookmarksView
+
+COMPONENTS_V2_FLAG = 32768
+
+
+class RenderSink:
+    def queue_render_data(self, bookmark: Bookmark, render_data: str) -> None:
+        bookmark.render_data = render_data
+
+
+def sample_trees() -> List[dict]:
+    text = {"type": 10, "content": "Nowa aktualizacja serwera! Sprawdź zmiany w kanale #ogłoszenia."}
+    gallery = {"type": 11, "items": [{"media": {"url": f"https://media.discordapp.net/attachments/1/{i}/image.png"}} for i in range(4)]}
+    buttons = {"type": 1, "components": [
+        {"type": 2, "label": "Regulamin", "url": "https://example.com/rules"},
+        {"type": 2, "label": "Zgłoś", "custom_id": "report"}
+    ]}
+    select = {"type": 1, "components": [{"type": 3, "placeholder": "Wybierz rolę", "custom_id": "roles"}]}
+    section = {"type": 15, "components": [text, {"type": 16, "media": {"url": "https://cdn.discordapp.com/t.png"}}]}
+
+    return [
+        {"components": [{"type": 17, "components": [text, gallery, buttons]}], "flags": COMPONENTS_V2_FLAG},
+        {"components": [{"type": 14, "components": [section, {"type": 13}, section, select, {"type": 12}]}], "flags": COMPONENTS_V2_FLAG},
+        {"components": [{"type": 14, "components": [{"type": 14, "components": [{"type": 15, "components": [text] * 3}] * 4}] * 3}], "flags": COMPONENTS_V2_FLAG},
+        {"components": [buttons, select], "flags": 0, "embeds": [{
+            "title": "Ogłoszenie",
+            "description": "Treść osadzenia " * 20,
+            "image": {"url": "https://media.tenor.com/abc/tenor.gif"},
+            "fields": [{"name": f"Pole {i}", "value": "wartość", "inline": True} for i in range(6)]
+        }]}
+    ]
+
+
+def synthetic_corpus(size: int) -> List[Bookmark]:
+    trees = sample_trees()
+    bookmarks = []
+    for i in range(size):
+        tree = trees[i % len(trees)]
+        attachments = [
+            {"url": f"https://cdn.discordapp.com/attachments/1/{i}/clip.mp4", "filename": "clip.mp4", "is_image": False},
+            {"url": f"https://cdn.discordapp.com/attachments/1/{i}/photo.png", "filename": "photo.png", "is_image": True}
+        ]
+        bookmarks.append(Bookmark(
+            i + 1, 1, 10_000 + i, 2, 3, "Zapisana wiadomość " * 5,
+            encode_payload(tree.get("embeds", []), DEFAULT_CODEC), "Autor", "https://cdn.discordapp.com/avatar.png",
+            "2024-01-01T12:00:00+00:00", "2024-01-02T12:00:00+00:00",
+            encode_payload(attachments, DEFAULT_CODEC), encode_payload(tree["components"], DEFAULT_CODEC),
+            tree["flags"], None, DEFAULT_CODEC
+        ))
+    return bookmarks
+
+
+def database_corpus(db_path: str, size: int) -> List[Bookmark]:
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(f"{SELECT_BOOKMARKS} ORDER BY b.id DESC LIMIT ?", (size,)).fetchall()
+    finally:
+        conn.close()
+    return [Bookmark.from_row(row) for row in rows]
+
+
+def measure(label: str, func: Callable[[], None], count: int, rounds: int) -> None:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) / count * 1e6)
+    print(f"{label:<28} median {statistics.median(timings):8.1f} µs   min {min(timings):8.1f} µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mikrobenchmark renderowania szczegółów zakładki")
+    parser.add_argument("--db", help="ścieżka do bookmarks.db z prawdziwymi zakładkami")
+    parser.add_argument("--size", type=int, default=400)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = database_corpus(args.db, args.size) if args.db else synthetic_corpus(args.size)
+    if not corpus:
+        print("Brak zakładek do renderowania")
+        return
+
+    view = BookmarksView(RenderSink())
+    count = len(corpus)
+
+    def cold() -> None:
+        for bookmark in corpus:
+            bookmark.render_cache = None
+            bookmark.render_data = None
+            view.create_bookmark_detail_embed(bookmark)
+
+    def stored() -> None:
+        for bookmark in corpus:
+            bookmark.render_cache = None
+            view.create_bookmark_detail_embed(bookmark)
+
+    def cached() -> None:
+        for bookmark in corpus:
+            view.create_bookmark_detail_embed(bookmark)
+
+    def walker() -> None:
+        for bookmark in corpus:
+            view._process_raw_components_v2(bookmark.components)
+
+    print(f"Korpus: {count} zakładek ({'baza' if args.db else 'syntetyczny'})")
+    measure("render bez cache", cold, count, args.rounds)
+    measure("render z render_data", stored, count, args.rounds)
+    measure("render z render_cache", cached, count, args.rounds)
+    measure("_process_raw_components_v2", walker, count, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
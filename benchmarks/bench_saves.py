@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.manager import DatabaseManager
+from fakes import MessageFactory
+
+MODES = {
+    # Partia jednego wiersza to jedna transakcja na zapis, czyli zachowanie sprzed grupowania zatwierdzeń.
+    "bez grupowania": {"batch_max_rows": 1, "batch_max_delay": 0.0},
+    "z grupowaniem": {}
+}
+
+
+async def measure(path: str, count: int, users: int, seed: int, options: dict) -> float:
+    factory = MessageFactory(seed)
+    messages = [factory.message() for _ in range(count)]
+    db = DatabaseManager(path, **options)
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            db.save_bookmark(
+                1_000 + index % users,
+                message,
+                json.dumps([embed.to_dict() for embed in message.embeds]) if message.embeds else None,
+                json.dumps([component.to_dict() for component in message.components]) if message.components else None,
+                message.flags.value,
+                message.guild.id
+            )
+            for index, message in enumerate(messages)
+        ))
+        return time.perf_counter() - start
+    finally:
+        await db.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Przepustowość równoległych zapisów zakładek z grupowaniem zatwierdzeń i bez")
+    parser.add_argument("--counts", default="200,2000", help="liczby równoległych zapisów oddzielone przecinkami")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'zapisy':>7} {'tryb':<15} {'zapisy/s':>10} {'czas ms':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(count) for count in args.counts.split(",")):
+            for label, options in MODES.items():
+                best = None
+                for attempt in range(args.repeat):
+                    path = os.path.join(directory, f"saves_{count}_{len(options)}_{attempt}.db")
+                    elapsed = await measure(path, count, args.users, args.seed + attempt, options)
+                    best = elapsed if best is None else min(best, elapsed)
+                print(f"{count:>7} {label:<15} {count / best:>10.0f} {best * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
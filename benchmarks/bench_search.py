@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.manager import DatabaseManager
+from fakes import MessageFactory
+
+BACKGROUND_USERS = 40
+
+
+async def seed(db: DatabaseManager, factory: MessageFactory, user_id: int, count: int) -> None:
+    while count > 0:
+        batch = min(count, 5000)
+        await db.import_bookmarks(user_id, factory.records(batch), batch_size=2000)
+        count -= batch
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Czas wyszukiwania zakładek w zależności od rozmiaru kolekcji użytkownika")
+    parser.add_argument("--corpus", type=int, default=200_000, help="liczba zakładek innych użytkowników")
+    parser.add_argument("--users", default="10,1000,1001,10000,50000", help="rozmiary kolekcji mierzonych użytkowników")
+    parser.add_argument("--queries", default="serwer,serw,muzyka film", help="zapytania oddzielone przecinkami")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.users.split(",")]
+    queries = args.queries.split(",")
+    factory = MessageFactory(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(os.path.join(directory, "search.db"))
+        try:
+            start = time.perf_counter()
+            for index in range(BACKGROUND_USERS):
+                await seed(db, factory, 1_000 + index, args.corpus // BACKGROUND_USERS)
+            for index, size in enumerate(sizes):
+                await seed(db, factory, 1 + index, size)
+            print(f"# zasiano {args.corpus + sum(sizes)} zakładek w {time.perf_counter() - start:.1f} s")
+
+            print(f"{'kolekcja':>9} {'zapytanie':<12} {'trafienia':>10} {'p50 ms':>8} {'max ms':>8}")
+            for index, size in enumerate(sizes):
+                for query in queries:
+                    latencies = []
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        _, total = await db.search_bookmarks(1 + index, query)
+                        latencies.append(time.perf_counter() - started)
+                    print(f"{size:>9} {query:<12} {total:>10} {statistics.median(latencies) * 1000:>8.2f} {max(latencies) * 1000:>8.2f}")
+        finally:
+            await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
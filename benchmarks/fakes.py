@@ -0,0 +1,269 @@
+import datetime
+import itertools
+import random
+from typing import Any, Dict, Iterator, List, Optional
+
+COMPONENTS_V2_FLAG = 32768
+
+_message_ids = itertools.count(1_000_000_000)
+
+WORDS = (
+    "serwer", "aktualizacja", "wydarzenie", "link", "zdjęcie", "ankieta", "turniej", "nagroda", "kanał",
+    "regulamin", "moderacja", "ogłoszenie", "spotkanie", "dzisiaj", "jutro", "gra", "muzyka", "film", "kod", "bot"
+)
+
+
+class FakeAvatar:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.display_name = name
+        self.display_avatar = FakeAvatar(f"https://cdn.discordapp.com/avatars/{user_id}/avatar.png")
+        self.mention = f"<@{user_id}>"
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.filesize_limit = 25 * 1024 * 1024
+
+
+class FakeAttachment:
+    def __init__(self, url: str, filename: str, content_type: str, size: int):
+        self.url = url
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+
+
+class FakeEmbed:
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._data
+
+
+class FakeComponent:
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._data
+
+
+class FakeFlags:
+    def __init__(self, value: int):
+        self.value = value
+
+
+class FakeMessage:
+    def __init__(self, author: FakeUser, guild: Optional[FakeGuild], channel: FakeChannel, content: str,
+                 attachments: List[FakeAttachment], embeds: List[FakeEmbed], components: List[FakeComponent], flags: int):
+        self.id = next(_message_ids)
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self.content = content
+        self.attachments = attachments
+        self.embeds = embeds
+        self.components = components
+        self.flags = FakeFlags(flags)
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.calls: List[str] = []
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, *args, **kwargs) -> None:
+        self.calls.append("send_message")
+        self._done = True
+
+    async def edit_message(self, *args, **kwargs) -> None:
+        self.calls.append("edit_message")
+        self._done = True
+
+    async def defer(self, *args, **kwargs) -> None:
+        self.calls.append("defer")
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.calls: List[str] = []
+
+    async def send(self, *args, **kwargs) -> None:
+        self.calls.append("send")
+
+
+class FakeTree:
+    def add_command(self, *args, **kwargs) -> None:
+        pass
+
+    def remove_command(self, *args, **kwargs) -> None:
+        pass
+
+
+class FakeIntents:
+    message_content = False
+
+
+class FakeBot:
+    def __init__(self):
+        self.tree = FakeTree()
+        self.intents = FakeIntents()
+        self.cogs: Dict[str, Any] = {}
+
+    def get_cog(self, name: str) -> Any:
+        return self.cogs.get(name)
+
+    def add_dynamic_items(self, *items) -> None:
+        pass
+
+    def remove_dynamic_items(self, *items) -> None:
+        pass
+
+    async def is_owner(self, user) -> bool:
+        return True
+
+
+class FakeInteraction:
+    def __init__(self, client: FakeBot, user: FakeUser, guild: Optional[FakeGuild]):
+        self.client = client
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.command = None
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+class MessageFactory:
+    def __init__(self, seed: int = 0, users: int = 200, guilds: int = 20):
+        self.random = random.Random(seed)
+        self.authors = [FakeUser(10_000 + i, f"Użytkownik {i}") for i in range(users)]
+        self.guilds = [FakeGuild(500 + i) for i in range(guilds)]
+
+    def text(self) -> str:
+        length = min(int(self.random.lognormvariate(2.5, 1.0)), 400)
+        return " ".join(self.random.choice(WORDS) for _ in range(length))
+
+    def attachments(self, message_id: int) -> List[FakeAttachment]:
+        if self.random.random() > 0.3:
+            return []
+
+        attachments = []
+        for index in range(self.random.choice((1, 1, 1, 2, 3, 4))):
+            if self.random.random() < 0.7:
+                filename, content_type = f"image{index}.png", "image/png"
+            elif self.random.random() < 0.5:
+                filename, content_type = f"clip{index}.mp4", "video/mp4"
+            else:
+                filename, content_type = f"plik{index}.pdf", "application/pdf"
+            attachments.append(FakeAttachment(
+                f"https://cdn.discordapp.com/attachments/1/{message_id}/{filename}?ex=abc&is=def&hm=123",
+                filename,
+                content_type,
+                self.random.randint(10_000, 8_000_000)
+            ))
+        return attachments
+
+    def embeds(self) -> List[FakeEmbed]:
+        if self.random.random() > 0.2:
+            return []
+
+        embeds = []
+        for _ in range(self.random.choice((1, 1, 2))):
+            data = {"type": "rich", "title": self.text()[:256], "description": self.text()}
+            if self.random.random() < 0.5:
+                data["fields"] = [
+                    {"name": self.random.choice(WORDS), "value": self.text()[:1024], "inline": True}
+                    for _ in range(self.random.randint(1, 6))
+                ]
+            if self.random.random() < 0.4:
+                data["image"] = {"url": "https://media.tenor.com/abc/tenor.gif"}
+            embeds.append(FakeEmbed(data))
+        return embeds
+
+    def component_tree(self, depth: int = 0) -> Dict[str, Any]:
+        if depth >= 3 or self.random.random() < 0.4:
+            kind = self.random.choice((2, 10, 10, 10, 11, 12, 13))
+            if kind == 2:
+                return {"type": 2, "label": self.random.choice(WORDS), "url": "https://example.com"}
+            if kind == 10:
+                return {"type": 10, "content": self.text()}
+            if kind == 11:
+                return {"type": 11, "items": [
+                    {"media": {"url": f"https://media.discordapp.net/attachments/1/{i}/image.png"}}
+                    for i in range(self.random.randint(1, 4))
+                ]}
+            return {"type": kind}
+        return {
+            "type": self.random.choice((14, 15, 1)),
+            "components": [self.component_tree(depth + 1) for _ in range(self.random.randint(1, 4))]
+        }
+
+    def message(self) -> FakeMessage:
+        message_id = next(_message_ids)
+        components = []
+        flags = 0
+        if self.random.random() < 0.15:
+            flags = COMPONENTS_V2_FLAG
+            components = [FakeComponent({"type": 17, "components": [self.component_tree(1) for _ in range(self.random.randint(1, 3))]})]
+        elif self.random.random() < 0.1:
+            components = [FakeComponent({"type": 1, "components": [
+                {"type": 2, "label": self.random.choice(WORDS), "custom_id": f"b{i}"} for i in range(self.random.randint(1, 5))
+            ]})]
+
+        message = FakeMessage(
+            self.random.choice(self.authors),
+            self.random.choice(self.guilds),
+            FakeChannel(self.random.randint(1, 200)),
+            "" if flags else self.text(),
+            self.attachments(message_id),
+            self.embeds(),
+            components,
+            flags
+        )
+        message.id = message_id
+        return message
+
+    def records(self, count: int) -> Iterator[Dict[str, Any]]:
+        for _ in range(count):
+            message = self.message()
+            yield {
+                "message_id": message.id,
+                "channel_id": message.channel.id,
+                "guild_id": message.guild.id,
+                "content": message.content,
+                "embeds": [embed.to_dict() for embed in message.embeds],
+                "author_name": message.author.display_name,
+                "author_avatar": message.author.display_avatar.url,
+                "timestamp": message.created_at.isoformat(),
+                "attachments": [
+                    {
+                        "url": attachment.url,
+                        "filename": attachment.filename,
+                        "content_type": attachment.content_type,
+                        "size": attachment.size,
+                        "is_image": attachment.content_type.startswith("image/")
+                    }
+                    for attachment in message.attachments
+                ],
+                "components": [component.to_dict() for component in message.components],
+                "message_flags": message.flags.value
+            }
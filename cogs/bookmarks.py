@@ -1,79 +1,227 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
+import datetime
 import json
-from typing import Optional
-from database.manager import DatabaseManager
-from ui.components import BookmarksView, BookmarkDetailView
-
-class ViewBookmarkButton(discord.ui.View):
-    def __init__(self, bookmark_id: int, db_manager: DatabaseManager, bookmarks_view: BookmarksView):
-        super().__init__(timeout=300)
-        self.bookmark_id = bookmark_id
-        self.db_manager = db_manager
-        self.bookmarks_view = bookmarks_view
-    
-    @discord.ui.button(label="Wyświetl zakładkę", style=discord.ButtonStyle.gray, emoji="📖")
-    async def view_bookmark(self, interaction: discord.Interaction, button: discord.ui.Button):
-        bookmark = self.db_manager.get_bookmark_by_id(self.bookmark_id, interaction.user.id)
-
-        if not bookmark:
-            await interaction.response.send_message(
-                "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu.",
-                ephemeral=True
-            )
-            return
+import os
+import tempfile
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+from database.backends import backend_from_url
+from database.blobs import BlobStore
+from database.export import read_import
+from database.manager import DatabaseManager, normalize_tags
+from database.models import BookmarkFilter, Reminder
+from ui.components import BookmarksView, ViewBookmarkButton, DYNAMIC_ITEMS
+from utils.metrics import PHASES, metrics
+from utils.mirror import AttachmentMirror
+from utils.ratelimit import RateLimit, RateLimiter, parse_rate_limits
+from utils.reminders import ReminderScheduler
+from utils.source_sync import SourceMessageSync
 
-        embed, additional_embeds, link_data = self.bookmarks_view.create_bookmark_detail_embed(bookmark)
-        all_embeds = [embed] + additional_embeds
+EXPORT_UPLOAD_LIMIT = 10 * 1024 * 1024
 
-        view = BookmarkDetailView(self.db_manager, self.bookmark_id, link_data)
+IMPORT_UPLOAD_LIMIT = 25 * 1024 * 1024
+IMPORT_MAX_BYTES = 256 * 1024 * 1024
+IMPORT_MAX_LINES = 100_000
 
-        await interaction.response.send_message(
-            embeds=all_embeds,
-            view=view,
-            ephemeral=True
-        )
+MAX_USER_REMINDERS = 100
+
+# Limity (użytkownik, serwer, proces). Limity serwera i procesu mieszczą falę zapisów jednej popularnej wiadomości.
+# Zakres "global" liczy się osobno w każdym procesie, więc przy kilku procesach klastra limit sumuje się między nimi.
+RATE_LIMITS = {
+    "save": (RateLimit(5, 10), RateLimit(600, 10), RateLimit(3000, 10)),
+    "browse": (RateLimit(10, 10), RateLimit(300, 10), RateLimit(3000, 10)),
+    "bulk": (RateLimit(2, 60), RateLimit(10, 60), RateLimit(30, 60))
+}
+
+COMMAND_RATE_LIMITS = {
+    "delete_bookmarks": "bulk",
+    "import_bookmarks": "bulk",
+    "export_bookmarks": "bulk"
+}
 
 class BookmarksCog(commands.Cog):
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: commands.Bot, db_manager: Optional[DatabaseManager] = None):
         self.bot = bot
-        self.db_manager = DatabaseManager()
-        self.bookmarks_view = BookmarksView(self.db_manager)
+        self.db_manager = db_manager or DatabaseManager(
+            backend=backend_from_url(os.getenv('database_url', 'bookmarks.db'))
+        )
+        self.blob_store: Optional[BlobStore] = None
+        self.attachment_mirror: Optional[AttachmentMirror] = None
+        mirror_dir = os.getenv('mirror_dir')
+        if mirror_dir:
+            self.blob_store = BlobStore(mirror_dir, int(os.getenv('mirror_max_bytes', 1024 ** 3)))
+            self.attachment_mirror = AttachmentMirror(self.db_manager, self.blob_store)
+        self.bookmarks_view = BookmarksView(self.db_manager, self.blob_store)
+        # Bez uprawnienia do treści wiadomości zdarzenia edycji mają pustą treść, więc śledzone są tylko usunięcia.
+        self.source_sync = SourceMessageSync(self.db_manager, track_edits=bot.intents.message_content)
+        self.reminders = ReminderScheduler(self.db_manager, self.send_reminder)
         self.ctx_menu = app_commands.ContextMenu(
             name="Save Message",
             callback=self.save_message_context_menu,
         )
         self.bot.tree.add_command(self.ctx_menu)
+        self.payload_migration: Optional[asyncio.Task] = None
+        self.rate_limiters = {action: RateLimiter(*self._rate_limits(action)) for action in RATE_LIMITS}
+        self.metrics_server: Optional[asyncio.AbstractServer] = None
+
+    async def cog_load(self):
+        self.bot.add_dynamic_items(*DYNAMIC_ITEMS)
+        self.payload_migration = asyncio.create_task(self.db_manager.migrate_payloads())
+        await self.db_manager.start_invalidation_listener()
+        if self.attachment_mirror:
+            await self.attachment_mirror.start()
+        self.source_sync.start()
+        self.reminders.start()
+        metrics.register_collector(self.collect_metrics)
+        metrics_port = os.getenv('metrics_port')
+        if metrics_port:
+            self.metrics_server = await metrics.serve("127.0.0.1", int(metrics_port))
 
     async def cog_unload(self):
         self.bot.tree.remove_command(self.ctx_menu.name, type=self.ctx_menu.type)
+        self.bot.remove_dynamic_items(*DYNAMIC_ITEMS)
+        if self.payload_migration:
+            self.payload_migration.cancel()
+        metrics.unregister_collector(self.collect_metrics)
+        if self.attachment_mirror:
+            await self.attachment_mirror.close()
+        await self.source_sync.close()
+        await self.reminders.close()
+        if self.metrics_server:
+            self.metrics_server.close()
+            await self.metrics_server.wait_closed()
+        await self.db_manager.close()
+
+    def collect_metrics(self):
+        for key, value in self.db_manager.cache_stats().items():
+            yield "bookmarks_cache", {"stat": key}, value
+        for key, value in self.db_manager.suggestions.stats().items():
+            yield "bookmarks_suggestions", {"stat": key}, value
+        for action, scopes in self.rate_limit_stats().items():
+            for scope, stats in scopes.items():
+                for key, value in stats.items():
+                    yield "bookmarks_rate_limit", {"action": action, "scope": scope, "stat": key}, value
+        if self.attachment_mirror:
+            for key, value in self.attachment_mirror.stats().items():
+                yield "bookmarks_attachment_mirror", {"stat": key}, value
+        for key, value in self.source_sync.stats().items():
+            yield "bookmarks_source_sync", {"stat": key}, value
+        for key, value in self.reminders.stats().items():
+            yield "bookmarks_reminders", {"stat": key}, value
+
+    async def check_rate_limit(self, interaction: discord.Interaction, action: str) -> bool:
+        retry_after = self.rate_limiters[action].hit(interaction.user.id, interaction.guild_id)
+        if not retry_after:
+            return True
+
+        await interaction.response.send_message(
+            f"⏳ Zbyt wiele żądań. Spróbuj ponownie za {retry_after:.1f} s.",
+            ephemeral=True
+        )
+        return False
+
+    @staticmethod
+    def _rate_limits(action: str) -> Tuple[RateLimit, ...]:
+        value = os.getenv(f'rate_limit_{action}')
+        if not value:
+            return RATE_LIMITS[action]
+        limits = parse_rate_limits(value)
+        if len(limits) != 3:
+            raise ValueError(f"rate_limit_{action} wymaga trzech limitów: użytkownik, serwer, proces")
+        return limits
+
+    def rate_limit_stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        return {action: limiter.stats() for action, limiter in self.rate_limiters.items()}
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        action = COMMAND_RATE_LIMITS.get(interaction.command.name, "browse") if interaction.command else "browse"
+        return await self.check_rate_limit(interaction, action)
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        # Odrzucenie przez limit zapytań dostało już odpowiedź w interaction_check, więc nie jest logowane.
+        if isinstance(error, app_commands.CheckFailure):
+            return
+        command = interaction.command.name if interaction.command else None
+        print(f"Błąd komendy {command}: {error}")
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+    async def schedule_reminder(self, user_id: int, bookmark_id: int, delay: int) -> Tuple[bool, str]:
+        # Istniejące przypomnienie tej zakładki jest tylko przesuwane, więc nie wlicza się do limitu.
+        if await self.db_manager.count_reminders(user_id, except_bookmark_id=bookmark_id) >= MAX_USER_REMINDERS:
+            return False, f"Możesz mieć najwyżej {MAX_USER_REMINDERS} aktywnych przypomnień."
+
+        reminder = await self.db_manager.add_reminder(user_id, bookmark_id, time.time() + delay)
+        if reminder is None:
+            return False, "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu."
+        self.reminders.schedule(reminder)
+        return True, f"⏰ Przypomnę Ci o zakładce #{bookmark_id} <t:{int(reminder.due_at)}:R>."
+
+    async def send_reminder(self, reminder: Reminder) -> None:
+        bookmark = await self.db_manager.get_bookmark_by_id(reminder.bookmark_id, reminder.user_id)
+        if bookmark is None:
+            return
+
+        user = self.bot.get_user(reminder.user_id) or await self.bot.fetch_user(reminder.user_id)
+        content = bookmark.content or ""
+        embed = discord.Embed(
+            title=f"⏰ Przypomnienie o zakładce #{bookmark.id}",
+            description=(content[:297] + "...") if len(content) > 300 else content or "*Brak treści*",
+            color=0x3498db,
+            timestamp=bookmark.created_at
+        )
+        embed.set_author(name=bookmark.author_name)
+        embed.add_field(
+            name="Link do wiadomości",
+            value=f"[Kliknij tutaj](https://discord.com/channels/{bookmark.guild_id}/{bookmark.channel_id}/{bookmark.message_id})"
+        )
+        await user.send(embed=embed, view=ViewBookmarkButton(reminder.user_id, bookmark.id))
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        self.source_sync.message_edited(payload.message_id, payload.data)
 
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.source_sync.messages_deleted((payload.message_id,))
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        self.source_sync.messages_deleted(payload.message_ids)
+
+    @metrics.instrumented("menu:save_message")
     async def save_message_context_menu(self, interaction: discord.Interaction, message: discord.Message):
-        embed_data = None
-        if message.embeds:
-            embed_list = []
-            for embed in message.embeds:
-                embed_dict = embed.to_dict()
-                embed_list.append(embed_dict)
-            embed_data = json.dumps(embed_list)
-
-        components_data = None
-        message_flags = getattr(message, 'flags', 0)
-        if hasattr(message_flags, 'value'):
-            message_flags = message_flags.value
-        elif not isinstance(message_flags, int):
-            message_flags = int(message_flags) if message_flags else 0
-        
-        if hasattr(message, 'components') and message.components:
-            try:
-                components_data = json.dumps([component.to_dict() for component in message.components])
-            except AttributeError:
-                components_data = json.dumps(message.components)
-        
-        guild_id = message.guild.id if message.guild else 0
+        if not await self.check_rate_limit(interaction, "save"):
+            return
+
+        with metrics.timed("render"):
+            embed_data = None
+            if message.embeds:
+                embed_list = []
+                for embed in message.embeds:
+                    embed_dict = embed.to_dict()
+                    embed_list.append(embed_dict)
+                embed_data = json.dumps(embed_list)
+
+            components_data = None
+            message_flags = getattr(message, 'flags', 0)
+            if hasattr(message_flags, 'value'):
+                message_flags = message_flags.value
+            elif not isinstance(message_flags, int):
+                message_flags = int(message_flags) if message_flags else 0
+
+            if hasattr(message, 'components') and message.components:
+                try:
+                    components_data = json.dumps([component.to_dict() for component in message.components])
+                except AttributeError:
+                    components_data = json.dumps(message.components)
+
+        guild_id = message.guild.id if message.guild else interaction.guild_id or 0
 
-        bookmark_id = self.db_manager.save_bookmark(
+        bookmark_id = await self.db_manager.save_bookmark(
             interaction.user.id, 
             message, 
             embed_data,
@@ -81,6 +229,8 @@ class BookmarksCog(commands.Cog):
             message_flags,
             guild_id
         )
+        if self.attachment_mirror and message.attachments:
+            self.attachment_mirror.submit(message.attachments)
 
         embed = discord.Embed(
             title="📌 Wiadomość zapisana!",
@@ -104,22 +254,67 @@ class BookmarksCog(commands.Cog):
             )
 
         embed.set_footer(text=f"Użyj /bookmarks aby zobaczyć swoje zakładki")
-        view = ViewBookmarkButton(bookmark_id, self.db_manager, self.bookmarks_view)
+        view = ViewBookmarkButton(interaction.user.id, bookmark_id)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
     @app_commands.command(name="bookmarks", description="Wyświetl swoje zapisane wiadomości")
     @app_commands.allowed_installs(guilds=True, users=True)
-    @app_commands.describe(page="Numer strony (domyślnie 1)")
-    async def bookmarks_command(self, interaction: discord.Interaction, page: Optional[int] = 1):
+    @app_commands.describe(
+        page="Numer strony (domyślnie 1)",
+        tag="Pokaż tylko zakładki z tym tagiem",
+        this_server="Pokaż tylko zakładki z tego serwera",
+        author="Pokaż tylko wiadomości tego autora (nazwa wyświetlana)",
+        since="Zapisane od dnia (RRRR-MM-DD)",
+        until="Zapisane do dnia włącznie (RRRR-MM-DD)",
+        has_attachments="Pokaż tylko wiadomości z załącznikami"
+    )
+    @metrics.instrumented("/bookmarks")
+    async def bookmarks_command(self, interaction: discord.Interaction, page: Optional[int] = 1,
+                                tag: Optional[str] = None, this_server: Optional[bool] = False,
+                                author: Optional[str] = None, since: Optional[str] = None,
+                                until: Optional[str] = None, has_attachments: Optional[bool] = False):
         if page < 1:
             page = 1
 
-        embed, view, bookmarks, total, max_pages = await self.bookmarks_view.create_bookmarks_page(interaction.user.id, page)
+        try:
+            saved_after = self._parse_day(since)
+            saved_before = self._parse_day(until)
+        except ValueError:
+            await interaction.response.send_message("Nieprawidłowa data. Użyj formatu RRRR-MM-DD.", ephemeral=True)
+            return
+        if saved_before is not None:
+            saved_before += datetime.timedelta(days=1)
+
+        guild_id = None
+        if this_server:
+            if interaction.guild_id is None:
+                await interaction.response.send_message("Filtr serwera działa tylko na serwerze.", ephemeral=True)
+                return
+            guild_id = interaction.guild_id
+
+        tags = normalize_tags([tag]) if tag else []
+        filters = BookmarkFilter(
+            tag=tags[0] if tags else None,
+            guild_id=guild_id,
+            author_name=author,
+            saved_after=saved_after.isoformat() if saved_after else None,
+            saved_before=saved_before.isoformat() if saved_before else None,
+            has_attachments=bool(has_attachments)
+        )
+        filter_id = None
+        if filters.active:
+            filter_id = await self.db_manager.save_list_filter(interaction.user.id, filters)
+        else:
+            filters = None
+
+        embed, view, bookmarks, total, max_pages = await self.bookmarks_view.create_bookmarks_page(
+            interaction.user.id, page, filters=filters, filter_id=filter_id
+        )
 
         if not bookmarks:
             empty_embed = discord.Embed(
                 title="📚 Twoje zakładki",
-                description="Nie masz jeszcze zapisanych wiadomości.",
+                description="Brak zakładek pasujących do filtrów." if filters else "Nie masz jeszcze zapisanych wiadomości.",
                 color=0x3498db
             )
             await interaction.response.send_message(embed=empty_embed, ephemeral=True)
@@ -127,33 +322,46 @@ class BookmarksCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
-    @app_commands.command(name="bookmark", description="Wyświetl szczegóły zapisanej wiadomości")
+    @bookmarks_command.autocomplete("tag")
+    @metrics.instrumented("autocomplete:tag")
+    async def tag_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        names = await self.db_manager.get_tag_names(interaction.user.id, current)
+        return [app_commands.Choice(name=name, value=name) for name in names]
+
+    @app_commands.command(name="bookmark_search", description="Wyszukaj w swoich zapisanych wiadomościach")
     @app_commands.allowed_installs(guilds=True, users=True)
-    @app_commands.describe(id="ID zakładki")
-    async def bookmark_command(self, interaction: discord.Interaction, id: int):
-        bookmark = self.db_manager.get_bookmark_by_id(id, interaction.user.id)
+    @app_commands.describe(query="Szukana fraza", page="Numer strony (domyślnie 1)")
+    @metrics.instrumented("/bookmark_search")
+    async def bookmark_search_command(self, interaction: discord.Interaction, query: app_commands.Range[str, 1, 50], page: Optional[int] = 1):
+        if page < 1:
+            page = 1
 
-        if not bookmark:
-            await interaction.response.send_message(
-                "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu.",
-                ephemeral=True
+        embed, view, bookmarks, total, max_pages = await self.bookmarks_view.create_search_page(interaction.user.id, query, page)
+
+        if not bookmarks:
+            empty_embed = discord.Embed(
+                title="🔎 Wyniki wyszukiwania",
+                description="Nie znaleziono zakładek pasujących do zapytania.",
+                color=0x3498db
             )
+            await interaction.response.send_message(embed=empty_embed, ephemeral=True)
             return
 
-        embed, additional_embeds, link_data = self.bookmarks_view.create_bookmark_detail_embed(bookmark)
-        all_embeds = [embed] + additional_embeds
-        view = BookmarkDetailView(self.db_manager, id, link_data)
-        await interaction.response.send_message(
-            embeds=all_embeds,
-            view=view,
-            ephemeral=True
-        )
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+    @app_commands.command(name="bookmark", description="Wyświetl szczegóły zapisanej wiadomości")
+    @app_commands.allowed_installs(guilds=True, users=True)
+    @app_commands.describe(id="ID zakładki")
+    @metrics.instrumented("/bookmark")
+    async def bookmark_command(self, interaction: discord.Interaction, id: int):
+        await self.bookmarks_view.send_bookmark_detail(interaction, id)
 
     @app_commands.command(name="delete_bookmark", description="Usuń zakładkę")
     @app_commands.allowed_installs(guilds=True, users=True)
     @app_commands.describe(id="ID zakładki do usunięcia")
+    @metrics.instrumented("/delete_bookmark")
     async def delete_bookmark_command(self, interaction: discord.Interaction, id: int):
-        success, message = self.db_manager.delete_bookmark(id, interaction.user.id)
+        success, message = await self.db_manager.delete_bookmark(id, interaction.user.id)
 
         if success:
             embed = discord.Embed(
@@ -170,5 +378,194 @@ class BookmarksCog(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @bookmark_command.autocomplete("id")
+    @delete_bookmark_command.autocomplete("id")
+    @metrics.instrumented("autocomplete:id")
+    async def bookmark_id_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+        suggestions = await self.db_manager.suggest_bookmarks(interaction.user.id, current)
+        return [app_commands.Choice(name=label, value=bookmark_id) for bookmark_id, label in suggestions]
+
+    @app_commands.command(name="delete_bookmarks", description="Usuń wiele zakładek naraz według filtrów")
+    @app_commands.allowed_installs(guilds=True, users=True)
+    @app_commands.describe(
+        author="Usuń zakładki wiadomości tego autora (nazwa wyświetlana)",
+        this_server="Usuń tylko zakładki z tego serwera",
+        since="Zapisane od dnia (RRRR-MM-DD)",
+        until="Zapisane do dnia włącznie (RRRR-MM-DD)",
+        everything="Potwierdź usunięcie wszystkich zakładek, gdy nie podano filtrów"
+    )
+    @metrics.instrumented("/delete_bookmarks")
+    async def delete_bookmarks_command(self, interaction: discord.Interaction, author: Optional[str] = None,
+                                       this_server: Optional[bool] = False, since: Optional[str] = None,
+                                       until: Optional[str] = None, everything: Optional[bool] = False):
+        try:
+            saved_after = self._parse_day(since)
+            saved_before = self._parse_day(until)
+        except ValueError:
+            await interaction.response.send_message("Nieprawidłowa data. Użyj formatu RRRR-MM-DD.", ephemeral=True)
+            return
+        if saved_before is not None:
+            saved_before += datetime.timedelta(days=1)
+
+        guild_id = None
+        if this_server:
+            if interaction.guild_id is None:
+                await interaction.response.send_message("Filtr serwera działa tylko na serwerze.", ephemeral=True)
+                return
+            guild_id = interaction.guild_id
+
+        if author is None and guild_id is None and saved_after is None and saved_before is None and not everything:
+            await interaction.response.send_message(
+                "Podaj przynajmniej jeden filtr lub ustaw `everything`, aby usunąć wszystkie zakładki.",
+                ephemeral=True
+            )
+            return
+
+        deleted = await self.db_manager.delete_bookmarks_by_filter(
+            interaction.user.id,
+            author_name=author,
+            guild_id=guild_id,
+            saved_after=saved_after,
+            saved_before=saved_before
+        )
+        embed = discord.Embed(
+            title="🗑️ Zakładki usunięte",
+            description=f"Usunięto zakładki: {deleted}",
+            color=0x00FF00
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @staticmethod
+    def _parse_day(value: Optional[str]) -> Optional[datetime.datetime]:
+        if not value:
+            return None
+        day = datetime.date.fromisoformat(value.strip())
+        return datetime.datetime.combine(day, datetime.time(), tzinfo=datetime.timezone.utc)
+
+    @app_commands.command(name="import_bookmarks", description="Zaimportuj zakładki z pliku")
+    @app_commands.allowed_installs(guilds=True, users=True)
+    @app_commands.describe(file="Plik JSON Lines (opcjonalnie skompresowany gzip), jedna zakładka w wierszu")
+    @metrics.instrumented("/import_bookmarks")
+    async def import_bookmarks_command(self, interaction: discord.Interaction, file: discord.Attachment):
+        if file.size > IMPORT_UPLOAD_LIMIT:
+            await interaction.response.send_message(
+                f"Plik jest za duży (limit {IMPORT_UPLOAD_LIMIT // 2 ** 20} MiB).",
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        try:
+            data = await file.read()
+            # Pierwszy przebieg tylko sprawdza plik, więc błędny wiersz nie zostawia częściowego importu.
+            total = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: sum(1 for _ in read_import(data, IMPORT_MAX_BYTES, IMPORT_MAX_LINES))
+            )
+            imported = await self.db_manager.import_bookmarks(interaction.user.id, read_import(data, IMPORT_MAX_BYTES, IMPORT_MAX_LINES))
+        except (discord.HTTPException, ValueError, *self.db_manager.backend.errors) as e:
+            embed = discord.Embed(
+                title="❌ Błąd",
+                description=f"Nie udało się zaimportować pliku: {e}",
+                color=0xFF0000
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="📥 Import zakończony",
+            description=f"Zaimportowano zakładki: {imported} z {total}",
+            color=0x00FF00
+        )
+        if imported < total:
+            embed.set_footer(text="Pozostałe wiadomości były już zapisane")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="export_bookmarks", description="Wyeksportuj wszystkie swoje zakładki do pliku")
+    @app_commands.allowed_installs(guilds=True, users=True)
+    @metrics.instrumented("/export_bookmarks")
+    async def export_bookmarks_command(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        with tempfile.TemporaryFile() as fp:
+            try:
+                exported = await self.db_manager.export_bookmarks(interaction.user.id, fp)
+            except (ValueError, OSError, *self.db_manager.backend.errors) as e:
+                embed = discord.Embed(
+                    title="❌ Błąd",
+                    description=f"Nie udało się wyeksportować zakładek: {e}",
+                    color=0xFF0000
+                )
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                return
+
+            if not exported:
+                await interaction.followup.send("Nie masz jeszcze zapisanych wiadomości.", ephemeral=True)
+                return
+
+            size = fp.tell()
+            limit = interaction.guild.filesize_limit if interaction.guild else EXPORT_UPLOAD_LIMIT
+            if size > limit:
+                embed = discord.Embed(
+                    title="❌ Błąd",
+                    description=f"Eksport ({size // 1024} KiB) przekracza limit wysyłania plików ({limit // 1024} KiB).",
+                    color=0xFF0000
+                )
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                return
+
+            fp.seek(0)
+            embed = discord.Embed(
+                title="📤 Eksport zakończony",
+                description=f"Wyeksportowano zakładki: {exported}",
+                color=0x00FF00
+            )
+            embed.set_footer(text="Plik można ponownie wczytać przez /import_bookmarks")
+            try:
+                await interaction.followup.send(
+                    embed=embed,
+                    file=discord.File(fp, filename="bookmarks.jsonl.gz"),
+                    ephemeral=True
+                )
+            except discord.HTTPException as e:
+                await interaction.followup.send(f"❌ Nie udało się wysłać pliku eksportu: {e}", ephemeral=True)
+
+    @app_commands.command(name="bot_stats", description="Statystyki wydajności bota (tylko właściciel)")
+    @app_commands.allowed_installs(guilds=True, users=True)
+    async def stats_command(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Ta komenda jest dostępna tylko dla właściciela bota.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="📊 Statystyki bota",
+            description="Czasy p50 / p95 / p99 w milisekundach" if metrics.enabled else "Pomiary są wyłączone (metrics=0)",
+            color=0x3498db
+        )
+        for name, phases in list(metrics.summary().items())[:22]:
+            lines = []
+            for phase in PHASES:
+                if phase in phases:
+                    _, p50, p95, p99 = phases[phase]
+                    lines.append(f"{phase}: {p50 * 1000:.1f} / {p95 * 1000:.1f} / {p99 * 1000:.1f}")
+            embed.add_field(name=f"{name} ({phases['total'][0]}×)", value="\n".join(lines), inline=True)
+
+        cache = self.db_manager.cache_stats()
+        embed.add_field(
+            name="Cache",
+            value=f"{cache['size']}/{cache['max_entries']} wpisów, trafienia {cache['hits']}, chybienia {cache['misses']}",
+            inline=False
+        )
+        throttled = {
+            action: sum(stats["throttled"] for stats in scopes.values())
+            for action, scopes in self.rate_limit_stats().items()
+        }
+        embed.add_field(
+            name="Limity zapytań",
+            value=", ".join(f"{action}: {count} odrzuconych" for action, count in throttled.items()),
+            inline=False
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(BookmarksCog(bot))
@@ -0,0 +1,32 @@
+import sqlite3
+from typing import Tuple, Type
+
+
+class StorageBackend:
+    name = "base"
+    errors: Tuple[Type[BaseException], ...] = (sqlite3.Error,)
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str = "bookmarks.db"):
+        self.path = path
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def __repr__(self) -> str:
+        return f"<SQLiteBackend path={self.path!r}>"
+
+
+def backend_from_url(url: str) -> StorageBackend:
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if "://" in url:
+        raise ValueError(f"Nieobsługiwany adres bazy danych: {url.split('://', 1)[0]}://")
+    return SQLiteBackend(url)
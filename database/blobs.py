@@ -0,0 +1,104 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class BlobStore:
+    def __init__(self, root: str, max_bytes: int = 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        blobs = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for entry in os.scandir(shard.path):
+                if len(entry.name) != 64:
+                    continue
+                stat = entry.stat()
+                blobs.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, digest, size in sorted(blobs):
+            self._entries[digest] = size
+            self.size += size
+        with self._lock:
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._entries and self._touch(digest):
+                return digest
+
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            if digest not in self._entries:
+                self._entries[digest] = len(data)
+                self.size += len(data)
+            self._evict(keep=digest)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            if digest not in self._entries or not self._touch(digest):
+                return None
+        return self.path(digest)
+
+    def _touch(self, digest: str) -> bool:
+        self._entries.move_to_end(digest)
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            self.size -= self._entries.pop(digest)
+            return False
+        return True
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        while self.size > self.max_bytes and self._entries:
+            digest, size = next(iter(self._entries.items()))
+            if digest == keep:
+                break
+            del self._entries[digest]
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(digest))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "blobs": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
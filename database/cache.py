@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = 4096, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Optional[Hashable]]]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, tag: Optional[Hashable] = None, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tag)
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> None:
+        self.generation += 1
+        for key in self._tags.pop(tag, set()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tag = self._entries.pop(key)
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
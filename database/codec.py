@@ -0,0 +1,55 @@
+import json
+import zlib
+from typing import Any, Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_JSON = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+DEFAULT_CODEC = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+_zstd_compressor = zstandard.ZstdCompressor(level=6) if zstandard is not None else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+
+def encode_payload(value: Any, codec: int = DEFAULT_CODEC) -> Optional[Union[str, bytes]]:
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        value = json.loads(value)
+
+    text = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    if codec == CODEC_JSON:
+        return text
+    if codec == CODEC_ZLIB:
+        return zlib.compress(text.encode(), 6)
+    if codec == CODEC_ZSTD:
+        if _zstd_compressor is None:
+            raise ValueError("Kodek zstd wymaga pakietu zstandard")
+        return _zstd_compressor.compress(text.encode())
+    raise ValueError(f"Nieznany kodek: {codec}")
+
+
+def decode_payload(data: Optional[Union[str, bytes]], codec: int = CODEC_JSON) -> Any:
+    if data is None:
+        return None
+    if codec == CODEC_JSON:
+        return json.loads(data)
+    if codec == CODEC_ZLIB:
+        try:
+            return json.loads(zlib.decompress(data))
+        except zlib.error as e:
+            raise ValueError(f"Uszkodzony ładunek zlib: {e}") from None
+    if codec == CODEC_ZSTD:
+        if _zstd_decompressor is None:
+            raise ValueError("Kodek zstd wymaga pakietu zstandard")
+        try:
+            return json.loads(_zstd_decompressor.decompress(data))
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Uszkodzony ładunek zstd: {e}") from None
+    raise ValueError(f"Nieznany kodek: {codec}")
@@ -0,0 +1,171 @@
+import datetime
+import gzip
+import io
+import json
+import zlib
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from database.models import Bookmark
+
+IMPORT_MAX_LINE_BYTES = 1024 * 1024
+IMPORT_MAX_EMBEDS = 10
+IMPORT_MAX_ATTACHMENTS = 10
+IMPORT_MAX_COMPONENTS = 40
+IMPORT_MAX_CONTENT = 4000
+IMPORT_MAX_NAME = 100
+IMPORT_MAX_FILENAME = 1024
+IMPORT_MAX_URL = 2048
+
+
+def bookmark_record(bookmark: Bookmark) -> Dict[str, Any]:
+    return {
+        "id": bookmark.id,
+        "message_id": bookmark.message_id,
+        "channel_id": bookmark.channel_id,
+        "guild_id": bookmark.guild_id,
+        "author_name": bookmark.author_name,
+        "author_avatar": bookmark.author_avatar,
+        "timestamp": bookmark.timestamp,
+        "saved_at": bookmark.saved_at,
+        "content": bookmark.content,
+        "embeds": bookmark.embeds,
+        "attachments": bookmark.attachments,
+        "components": bookmark.components,
+        "message_flags": bookmark.message_flags,
+        "tags": bookmark.tags
+    }
+
+
+def write_export(bookmarks: Iterable[Bookmark], fileobj: BinaryIO, compresslevel: int = 6) -> int:
+    count = 0
+    with gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=compresslevel) as stream:
+        for bookmark in bookmarks:
+            line = json.dumps(bookmark_record(bookmark), separators=(",", ":"), ensure_ascii=False)
+            stream.write((line + "\n").encode())
+            count += 1
+    return count
+
+
+def _parse_id(record: Dict[str, Any], field: str, required: bool = True) -> int:
+    value = record.get(field)
+    if value is None and not required:
+        return 0
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value < 2 ** 63:
+        raise ValueError(f"pole {field} musi być identyfikatorem Discorda")
+    if required and value == 0:
+        raise ValueError(f"pole {field} musi być identyfikatorem Discorda")
+    return value
+
+
+def _parse_datetime(record: Dict[str, Any], field: str, required: bool = True) -> Optional[str]:
+    value = record.get(field)
+    if value is None and not required:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        # Daty zapisu są porównywane jako tekst, więc muszą mieć tę samą postać co przy zwykłym zapisie (UTC).
+        return parsed.astimezone(datetime.timezone.utc).isoformat()
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"pole {field} musi być datą w formacie ISO 8601") from None
+
+
+def _parse_text(record: Dict[str, Any], field: str, max_length: int) -> Optional[str]:
+    value = record.get(field)
+    if value is not None and (not isinstance(value, str) or len(value) > max_length):
+        raise ValueError(f"pole {field} musi być tekstem o długości do {max_length} znaków")
+    return value
+
+
+def _parse_url(value: Any, field: str) -> str:
+    if not isinstance(value, str) or len(value) > IMPORT_MAX_URL or not value.startswith(("https://", "http://")):
+        raise ValueError(f"pole {field} musi być adresem http(s)")
+    return value
+
+
+def _parse_objects(record: Dict[str, Any], field: str, max_items: int) -> List[Dict[str, Any]]:
+    value = record.get(field)
+    if value is None:
+        return []
+    if not isinstance(value, list) or len(value) > max_items or not all(isinstance(item, dict) for item in value):
+        raise ValueError(f"pole {field} musi być listą obiektów (najwyżej {max_items})")
+    return value
+
+
+def parse_import_record(record: Any) -> Dict[str, Any]:
+    if not isinstance(record, dict):
+        raise ValueError("wiersz musi być obiektem JSON")
+
+    attachments = []
+    for attachment in _parse_objects(record, "attachments", IMPORT_MAX_ATTACHMENTS):
+        filename = _parse_text(attachment, "filename", IMPORT_MAX_FILENAME)
+        content_type = _parse_text(attachment, "content_type", IMPORT_MAX_NAME)
+        size = attachment.get("size") or 0
+        if not filename or not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            raise ValueError("załącznik musi mieć nazwę pliku i nieujemny rozmiar")
+        attachments.append({
+            "url": _parse_url(attachment.get("url"), "attachments.url"),
+            "filename": filename,
+            "content_type": content_type,
+            "size": size
+        })
+
+    author_avatar = record.get("author_avatar")
+    if author_avatar is not None:
+        author_avatar = _parse_url(author_avatar, "author_avatar")
+
+    message_flags = record.get("message_flags") or 0
+    if not isinstance(message_flags, int) or isinstance(message_flags, bool) or not 0 <= message_flags < 2 ** 31:
+        raise ValueError("pole message_flags musi być nieujemną liczbą całkowitą")
+
+    tags = record.get("tags") or []
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        raise ValueError("pole tags musi być listą tekstów")
+
+    return {
+        "message_id": _parse_id(record, "message_id"),
+        "channel_id": _parse_id(record, "channel_id"),
+        "guild_id": _parse_id(record, "guild_id", required=False),
+        "content": _parse_text(record, "content", IMPORT_MAX_CONTENT),
+        "embeds": _parse_objects(record, "embeds", IMPORT_MAX_EMBEDS),
+        "author_name": _parse_text(record, "author_name", IMPORT_MAX_NAME),
+        "author_avatar": author_avatar,
+        "timestamp": _parse_datetime(record, "timestamp"),
+        "saved_at": _parse_datetime(record, "saved_at", required=False),
+        "attachments": attachments,
+        "components": _parse_objects(record, "components", IMPORT_MAX_COMPONENTS),
+        "message_flags": message_flags,
+        "tags": tags
+    }
+
+
+def read_import(data: bytes, max_bytes: int, max_lines: int) -> Iterator[Dict[str, Any]]:
+    stream = gzip.GzipFile(fileobj=io.BytesIO(data)) if data[:2] == b"\x1f\x8b" else io.BytesIO(data)
+    total = 0
+    line_number = 0
+    try:
+        while True:
+            # Limit długości wiersza i łącznego rozmiaru po rozpakowaniu chroni przed bombami gzip.
+            line = stream.readline(IMPORT_MAX_LINE_BYTES + 1)
+            if not line:
+                return
+            line_number += 1
+            total += len(line)
+            if line_number > max_lines:
+                raise ValueError(f"plik ma więcej niż {max_lines} wierszy")
+            if total > max_bytes:
+                raise ValueError(f"plik po rozpakowaniu przekracza {max_bytes // 2 ** 20} MiB")
+            if len(line) > IMPORT_MAX_LINE_BYTES:
+                raise ValueError(f"wiersz {line_number} przekracza {IMPORT_MAX_LINE_BYTES // 1024} KiB")
+            if not line.strip():
+                continue
+            try:
+                record = parse_import_record(json.loads(line))
+            except (ValueError, RecursionError) as e:
+                raise ValueError(f"wiersz {line_number}: {e}") from None
+            yield record
+    except (OSError, EOFError, zlib.error) as e:
+        raise ValueError(f"uszkodzony plik gzip ({e})") from None
@@ -0,0 +1,1507 @@
+import asyncio
+import datetime
+import hashlib
+import itertools
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from database.backends import SQLiteBackend, StorageBackend
+from database.cache import LRUCache
+from database.codec import CODEC_JSON, DEFAULT_CODEC, decode_payload, encode_payload
+from database.export import write_export
+from database.models import Bookmark, BookmarkFilter, BookmarkSummary, Reminder
+from database.suggestions import SuggestionIndex
+from utils.metrics import metrics
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp')
+
+SEARCH_WORD = re.compile(r"[^\W_]+")
+
+MAX_TAGS = 10
+MAX_TAG_LENGTH = 32
+
+MAX_LIST_FILTERS = 25
+
+SNAPSHOT_COLUMNS = (
+    "message_id, content_hash, channel_id, guild_id, content, embed_data, author_name, "
+    "author_avatar, timestamp, attachments_data, components_data, message_flags, payload_codec"
+)
+
+BOOKMARK_COLUMNS = (
+    "b.id, b.user_id, s.message_id, s.channel_id, s.guild_id, s.content, s.embed_data, s.author_name, "
+    "s.author_avatar, s.timestamp, b.saved_at, s.attachments_data, s.components_data, s.message_flags, s.render_data, "
+    "s.payload_codec, s.source_deleted_at, "
+    "(SELECT group_concat(t.name, ',') FROM bookmark_tags bt JOIN tags t ON t.id = bt.tag_id WHERE bt.bookmark_id = b.id), "
+    "b.snapshot_id"
+)
+
+SELECT_BOOKMARKS = f"SELECT {BOOKMARK_COLUMNS} FROM bookmarks b JOIN message_snapshots s ON s.id = b.snapshot_id"
+
+SUMMARY_COLUMNS = "b.id, ss.author_name, ss.timestamp, ss.preview, ss.image_count, ss.file_count"
+
+BUMP_INVALIDATION = """
+    INSERT INTO cache_invalidations (user_id, seq)
+    VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_invalidations))
+    ON CONFLICT (user_id) DO UPDATE SET seq = excluded.seq
+"""
+
+SELECT_SUMMARIES = f"SELECT {SUMMARY_COLUMNS} FROM bookmarks b JOIN snapshot_summaries ss ON ss.snapshot_id = b.snapshot_id"
+
+
+def _build_preview(content: Optional[str]) -> str:
+    content = content or ""
+    if len(content) > 100:
+        return content[:97] + "..."
+    return content
+
+
+def _count_attachments(attachments: Optional[List[Dict]]) -> Tuple[int, int]:
+    if not attachments:
+        return 0, 0
+    image_count = sum(1 for att in attachments if att.get("is_image"))
+    return image_count, len(attachments) - image_count
+
+
+def _attachment_entry(url: str, filename: str, content_type: Optional[str], size: Optional[int]) -> Dict[str, Any]:
+    content_type = content_type or ""
+    is_image = content_type.startswith("image/") or filename.lower().endswith(IMAGE_EXTENSIONS)
+    return {
+        "url": url,
+        "filename": filename,
+        "content_type": content_type,
+        "size": size or 0,
+        "is_image": is_image
+    }
+
+
+def attachment_url_key(url: str) -> str:
+    return url.split("?", 1)[0]
+
+
+def _snapshot_hash(channel_id: int, guild_id: int, content: Optional[str], embed_data: Optional[str],
+                   author_name: Optional[str], author_avatar: Optional[str], timestamp: str,
+                   attachments_data: Optional[str], components_data: Optional[str], message_flags: int) -> str:
+    # Migawki są współdzielone między użytkownikami, więc skrót obejmuje każde zapisywane pole.
+    # Inaczej zaimportowany rekord z podmienionym autorem trafiłby do zakładek innych osób.
+    attachments = []
+    if attachments_data:
+        attachments = [
+            (att.get("filename"), att.get("size"), attachment_url_key(att.get("url", "")),
+             att.get("content_type"), att.get("is_image"))
+            for att in json.loads(attachments_data)
+        ]
+    payload = json.dumps([
+        channel_id, guild_id, content, embed_data, author_name, author_avatar, timestamp,
+        attachments, components_data, message_flags
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _extract_search_text(embed_data: Optional[str], components_data: Optional[str]) -> Tuple[str, str]:
+    embed_parts = []
+    if embed_data:
+        try:
+            for embed_dict in json.loads(embed_data):
+                embed_parts.extend(
+                    embed_dict[key] for key in ("title", "description") if embed_dict.get(key)
+                )
+        except (ValueError, TypeError, AttributeError):
+            pass
+
+    component_parts = []
+    if components_data:
+        try:
+            stack = list(reversed(json.loads(components_data)))
+        except (ValueError, TypeError):
+            stack = []
+        while stack:
+            component = stack.pop()
+            if not isinstance(component, dict):
+                continue
+            if component.get("type") == 10 and component.get("content"):
+                component_parts.append(component["content"])
+            stack.extend(reversed(component.get("components", [])))
+
+    return "\n".join(component_parts), "\n".join(embed_parts)
+
+
+def normalize_tags(names: Iterable[str]) -> List[str]:
+    tags = []
+    for name in names:
+        # Przecinek rozdziela tagi w formularzu i w kolumnie group_concat, więc nie może być częścią nazwy.
+        tag = " ".join(name.replace(",", " ").split()).lower()[:MAX_TAG_LENGTH]
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags[:MAX_TAGS]
+
+
+def _search_words(text: str) -> List[str]:
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    return SEARCH_WORD.findall("".join(char for char in folded if not unicodedata.combining(char)))
+
+
+def _search_tokens(user_id: int, text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    # Prefiks właściciela rozdziela słownik indeksu na użytkowników, więc MATCH (także prefiksowy) czyta tylko ich termy.
+    prefix = f"{user_id:x}x"
+    return " ".join(prefix + word for word in _search_words(text))
+
+
+def _build_search_query(user_id: int, query: str) -> str:
+    prefix = f"{user_id:x}x"
+    return " ".join(f'"{prefix}{word}"*' for word in _search_words(query))
+
+
+class DatabaseManager:
+    def __init__(self, db_path: str = "bookmarks.db", read_workers: int = 4, cache_entries: int = 4096,
+                 cache_ttl: float = 300.0, batch_max_rows: int = 128, batch_max_delay: float = 0.005,
+                 backend: Optional[StorageBackend] = None, invalidation_interval: float = 1.0):
+        self.db_path = db_path
+        self.backend = backend or SQLiteBackend(db_path)
+        self.batch_max_rows = batch_max_rows
+        self.batch_max_delay = batch_max_delay
+        self.invalidation_interval = invalidation_interval
+        self._save_queue: Optional[asyncio.Queue] = None
+        self._save_flusher: Optional[asyncio.Task] = None
+        self._invalidation_listener: Optional[asyncio.Task] = None
+        self.cache = LRUCache(max_entries=cache_entries, ttl=cache_ttl)
+        self.suggestions = SuggestionIndex()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+        self._write_executor.submit(self._with_connection, self._init_db, ()).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = self.backend.connect()
+        conn.create_function("search_tokens", 2, _search_tokens, deterministic=True)
+        return conn
+
+    def _get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _with_connection(self, func: Callable, args: tuple) -> Any:
+        return func(self._get_connection(), *args)
+
+    async def _run_read(self, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        with metrics.timed("db"):
+            return await loop.run_in_executor(self._read_executor, self._with_connection, func, args)
+
+    async def _run_write(self, func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        with metrics.timed("db"):
+            return await loop.run_in_executor(self._write_executor, self._with_connection, func, args)
+
+    def _init_db(self, conn: sqlite3.Connection) -> None:
+        migrations = [
+            self._migration_base_schema,
+            self._migration_keyset_pagination,
+            self._migration_search_index,
+            self._migration_render_cache,
+            self._migration_message_snapshots,
+            self._migration_payload_codec,
+            self._migration_list_summaries,
+            self._migration_cache_invalidations,
+            self._migration_attachment_mirrors,
+            self._migration_unique_saves,
+            self._migration_source_tracking,
+            self._migration_reminders,
+            self._migration_tags_and_filters,
+            self._migration_render_data_without_embeds,
+            self._migration_user_search_index,
+            self._migration_refresh_denormalized_columns,
+            self._migration_list_filter_expiry,
+        ]
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in enumerate(migrations[version:], start=version + 1):
+            with conn:
+                conn.execute("BEGIN")
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+
+    def _migration_base_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS bookmarks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                channel_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL DEFAULT 0,
+                content TEXT,
+                embed_data TEXT,
+                author_name TEXT,
+                author_avatar TEXT,
+                timestamp TEXT NOT NULL,
+                saved_at TEXT NOT NULL,
+                attachments_data TEXT,
+                components_data TEXT,
+                message_flags INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_user_id ON bookmarks (user_id)")
+
+    def _migration_keyset_pagination(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DROP INDEX IF EXISTS idx_bookmarks_user_id")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_user_cursor ON bookmarks (user_id, id)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_bookmark_counts (
+                user_id INTEGER PRIMARY KEY,
+                total INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            INSERT OR REPLACE INTO user_bookmark_counts (user_id, total)
+            SELECT user_id, COUNT(*) FROM bookmarks GROUP BY user_id
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_bookmarks_count_insert AFTER INSERT ON bookmarks
+            BEGIN
+                INSERT INTO user_bookmark_counts (user_id, total) VALUES (NEW.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET total = total + 1;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_bookmarks_count_delete AFTER DELETE ON bookmarks
+            BEGIN
+                UPDATE user_bookmark_counts SET total = total - 1 WHERE user_id = OLD.user_id;
+            END
+        """)
+
+    def _migration_search_index(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS bookmarks_fts USING fts5(
+                content, author_name, components_text, embed_text,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_bookmarks_fts_delete AFTER DELETE ON bookmarks
+            BEGIN
+                DELETE FROM bookmarks_fts WHERE rowid = OLD.id;
+            END
+        """)
+        rows = conn.execute("SELECT id, content, author_name, embed_data, components_data FROM bookmarks")
+        conn.executemany(
+            "INSERT INTO bookmarks_fts (rowid, content, author_name, components_text, embed_text) VALUES (?, ?, ?, ?, ?)",
+            ((bookmark_id, content, author_name, *_extract_search_text(embed_data, components_data))
+             for bookmark_id, content, author_name, embed_data, components_data in rows)
+        )
+
+    def _migration_render_cache(self, conn: sqlite3.Connection) -> None:
+        conn.execute("ALTER TABLE bookmarks ADD COLUMN render_data TEXT")
+
+    def _migration_message_snapshots(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE message_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message_id INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                guild_id INTEGER NOT NULL DEFAULT 0,
+                content TEXT,
+                embed_data TEXT,
+                author_name TEXT,
+                author_avatar TEXT,
+                timestamp TEXT NOT NULL,
+                attachments_data TEXT,
+                components_data TEXT,
+                message_flags INTEGER NOT NULL DEFAULT 0,
+                render_data TEXT,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                UNIQUE (message_id, content_hash)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE bookmarks_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                snapshot_id INTEGER NOT NULL REFERENCES message_snapshots (id),
+                saved_at TEXT NOT NULL
+            )
+        """)
+
+        rows = conn.execute("""
+            SELECT id, user_id, message_id, channel_id, guild_id, content, embed_data, author_name,
+                   author_avatar, timestamp, saved_at, attachments_data, components_data, message_flags, render_data
+            FROM bookmarks ORDER BY id
+        """).fetchall()
+        for (bookmark_id, user_id, message_id, channel_id, guild_id, content, embed_data, author_name,
+             author_avatar, timestamp, saved_at, attachments_data, components_data, message_flags, render_data) in rows:
+            content_hash = _snapshot_hash(channel_id, guild_id, content, embed_data, author_name, author_avatar,
+                                          timestamp, attachments_data, components_data, message_flags)
+            conn.execute("""
+                INSERT INTO message_snapshots (message_id, content_hash, channel_id, guild_id, content, embed_data,
+                    author_name, author_avatar, timestamp, attachments_data, components_data, message_flags, render_data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (message_id, content_hash) DO NOTHING
+            """, (message_id, content_hash, channel_id, guild_id, content, embed_data, author_name,
+                  author_avatar, timestamp, attachments_data, components_data, message_flags, render_data))
+            conn.execute("""
+                INSERT INTO bookmarks_new (id, user_id, snapshot_id, saved_at)
+                SELECT ?, ?, id, ? FROM message_snapshots WHERE message_id = ? AND content_hash = ?
+            """, (bookmark_id, user_id, saved_at, message_id, content_hash))
+
+        conn.execute("DROP TABLE bookmarks")
+        conn.execute("ALTER TABLE bookmarks_new RENAME TO bookmarks")
+        conn.execute("UPDATE message_snapshots SET refcount = (SELECT COUNT(*) FROM bookmarks WHERE snapshot_id = message_snapshots.id)")
+        conn.execute("CREATE INDEX idx_bookmarks_user_cursor ON bookmarks (user_id, id)")
+        conn.execute("CREATE INDEX idx_bookmarks_snapshot ON bookmarks (snapshot_id, user_id)")
+
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_count_insert AFTER INSERT ON bookmarks
+            BEGIN
+                INSERT INTO user_bookmark_counts (user_id, total) VALUES (NEW.user_id, 1)
+                ON CONFLICT (user_id) DO UPDATE SET total = total + 1;
+                UPDATE message_snapshots SET refcount = refcount + 1 WHERE id = NEW.snapshot_id;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_count_delete AFTER DELETE ON bookmarks
+            BEGIN
+                UPDATE user_bookmark_counts SET total = total - 1 WHERE user_id = OLD.user_id;
+                UPDATE message_snapshots SET refcount = refcount - 1 WHERE id = OLD.snapshot_id;
+                DELETE FROM message_snapshots WHERE id = OLD.snapshot_id AND refcount <= 0;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER trg_snapshots_fts_delete AFTER DELETE ON message_snapshots
+            BEGIN
+                DELETE FROM bookmarks_fts WHERE rowid = OLD.id;
+            END
+        """)
+
+        conn.execute("DELETE FROM bookmarks_fts")
+        snapshots = conn.execute("SELECT id, content, author_name, embed_data, components_data FROM message_snapshots")
+        conn.executemany(
+            "INSERT INTO bookmarks_fts (rowid, content, author_name, components_text, embed_text) VALUES (?, ?, ?, ?, ?)",
+            ((snapshot_id, content, author_name, *_extract_search_text(embed_data, components_data))
+             for snapshot_id, content, author_name, embed_data, components_data in snapshots)
+        )
+
+    def _migration_payload_codec(self, conn: sqlite3.Connection) -> None:
+        conn.execute(f"ALTER TABLE message_snapshots ADD COLUMN payload_codec INTEGER NOT NULL DEFAULT {CODEC_JSON}")
+
+    def _migration_list_summaries(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE snapshot_summaries (
+                snapshot_id INTEGER PRIMARY KEY,
+                author_name TEXT,
+                timestamp TEXT NOT NULL,
+                preview TEXT NOT NULL,
+                image_count INTEGER NOT NULL DEFAULT 0,
+                file_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER trg_snapshots_summary_delete AFTER DELETE ON message_snapshots
+            BEGIN
+                DELETE FROM snapshot_summaries WHERE snapshot_id = OLD.id;
+            END
+        """)
+        rows = conn.execute("SELECT id, author_name, timestamp, content, attachments_data, payload_codec FROM message_snapshots")
+        for snapshot_id, author_name, timestamp, content, attachments_data, payload_codec in rows.fetchall():
+            try:
+                counts = _count_attachments(decode_payload(attachments_data, payload_codec))
+            except (ValueError, TypeError):
+                counts = (0, 0)
+            conn.execute(
+                "INSERT INTO snapshot_summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (snapshot_id, author_name, timestamp, _build_preview(content), *counts)
+            )
+
+    def _migration_cache_invalidations(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE cache_invalidations (
+                user_id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX idx_cache_invalidations_seq ON cache_invalidations (seq)")
+        for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+            conn.execute(f"""
+                CREATE TRIGGER trg_bookmarks_invalidate_{event.lower()} AFTER {event} ON bookmarks
+                BEGIN
+                    INSERT INTO cache_invalidations (user_id, seq)
+                    VALUES ({row}.user_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_invalidations))
+                    ON CONFLICT (user_id) DO UPDATE SET seq = excluded.seq;
+                END
+            """)
+
+    def _migration_attachment_mirrors(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE attachment_mirrors (
+                url_key TEXT PRIMARY KEY,
+                blob_hash TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                content_type TEXT,
+                size INTEGER NOT NULL,
+                mirrored_at TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+    def _migration_unique_saves(self, conn: sqlite3.Connection) -> None:
+        conn.execute("ALTER TABLE bookmarks ADD COLUMN message_id INTEGER NOT NULL DEFAULT 0")
+        conn.execute("UPDATE bookmarks SET message_id = (SELECT message_id FROM message_snapshots WHERE id = bookmarks.snapshot_id)")
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_snapshot_update AFTER UPDATE OF snapshot_id ON bookmarks
+            WHEN OLD.snapshot_id != NEW.snapshot_id
+            BEGIN
+                UPDATE message_snapshots SET refcount = refcount + 1 WHERE id = NEW.snapshot_id;
+                UPDATE message_snapshots SET refcount = refcount - 1 WHERE id = OLD.snapshot_id;
+                DELETE FROM message_snapshots WHERE id = OLD.snapshot_id AND refcount <= 0;
+                INSERT INTO cache_invalidations (user_id, seq)
+                VALUES (NEW.user_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM cache_invalidations))
+                ON CONFLICT (user_id) DO UPDATE SET seq = excluded.seq;
+            END
+        """)
+
+        # Duplikaty zostają scalone w najstarszą zakładkę (zachowuje ID), z migawką z najnowszego zapisu.
+        conn.execute("""
+            UPDATE bookmarks SET snapshot_id = (
+                SELECT newest.snapshot_id FROM bookmarks newest
+                WHERE newest.user_id = bookmarks.user_id AND newest.message_id = bookmarks.message_id
+                ORDER BY newest.id DESC LIMIT 1
+            )
+            WHERE id IN (SELECT MIN(id) FROM bookmarks GROUP BY user_id, message_id HAVING COUNT(*) > 1)
+        """)
+        conn.execute("DELETE FROM bookmarks WHERE id NOT IN (SELECT MIN(id) FROM bookmarks GROUP BY user_id, message_id)")
+        conn.execute("CREATE UNIQUE INDEX idx_bookmarks_user_message ON bookmarks (user_id, message_id)")
+
+    def _migration_source_tracking(self, conn: sqlite3.Connection) -> None:
+        conn.execute("ALTER TABLE message_snapshots ADD COLUMN source_deleted_at TEXT")
+        conn.execute("CREATE INDEX idx_bookmarks_message ON bookmarks (message_id)")
+
+    def _migration_reminders(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE reminders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                bookmark_id INTEGER NOT NULL UNIQUE REFERENCES bookmarks (id) ON DELETE CASCADE,
+                due_at REAL NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX idx_reminders_due ON reminders (due_at, id)")
+        conn.execute("CREATE INDEX idx_reminders_user ON reminders (user_id)")
+
+    def _migration_tags_and_filters(self, conn: sqlite3.Connection) -> None:
+        # Kolumny filtrów są kopiowane z migawki do bookmarks, żeby filtry i liczniki korzystały z indeksów złożonych.
+        conn.execute("ALTER TABLE bookmarks ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0")
+        conn.execute("ALTER TABLE bookmarks ADD COLUMN author_name TEXT COLLATE NOCASE")
+        conn.execute("ALTER TABLE bookmarks ADD COLUMN has_attachments INTEGER NOT NULL DEFAULT 0")
+        conn.execute("""
+            UPDATE bookmarks SET
+                guild_id = (SELECT guild_id FROM message_snapshots WHERE id = bookmarks.snapshot_id),
+                author_name = (SELECT author_name FROM snapshot_summaries WHERE snapshot_id = bookmarks.snapshot_id),
+                has_attachments = (
+                    SELECT image_count + file_count > 0 FROM snapshot_summaries WHERE snapshot_id = bookmarks.snapshot_id
+                )
+        """)
+        conn.execute("CREATE INDEX idx_bookmarks_user_guild ON bookmarks (user_id, guild_id, id)")
+        conn.execute("CREATE INDEX idx_bookmarks_user_author ON bookmarks (user_id, author_name, id)")
+        conn.execute("CREATE INDEX idx_bookmarks_user_attachments ON bookmarks (user_id, has_attachments, id)")
+        conn.execute("CREATE INDEX idx_bookmarks_user_saved ON bookmarks (user_id, saved_at)")
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_attachments_update AFTER UPDATE OF snapshot_id ON bookmarks
+            BEGIN
+                UPDATE bookmarks SET has_attachments = (
+                    SELECT image_count + file_count > 0 FROM snapshot_summaries WHERE snapshot_id = NEW.snapshot_id
+                )
+                WHERE id = NEW.id;
+            END
+        """)
+        conn.execute("""
+            CREATE TABLE tags (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                UNIQUE (user_id, name)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE bookmark_tags (
+                tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+                bookmark_id INTEGER NOT NULL REFERENCES bookmarks (id) ON DELETE CASCADE,
+                PRIMARY KEY (tag_id, bookmark_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX idx_bookmark_tags_bookmark ON bookmark_tags (bookmark_id, tag_id)")
+        conn.execute("""
+            CREATE TABLE list_filters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                spec TEXT NOT NULL,
+                UNIQUE (user_id, spec)
+            )
+        """)
+
+    def _migration_render_data_without_embeds(self, conn: sqlite3.Connection) -> None:
+        # Stare wpisy render_data zawierały zdekodowane kopie embedów; cache jest odtwarzany przy pierwszym wyświetleniu.
+        conn.execute("UPDATE message_snapshots SET render_data = NULL WHERE render_data IS NOT NULL")
+
+    def _migration_user_search_index(self, conn: sqlite3.Connection) -> None:
+        # bookmarks_fts jest wspólny dla wszystkich, więc MATCH czytał trafienia całej bazy i dopiero potem odrzucał cudze.
+        conn.execute("""
+            CREATE VIRTUAL TABLE bookmark_search USING fts5(
+                content, author_name, components_text, embed_text,
+                content = '', tokenize = 'unicode61 remove_diacritics 0'
+            )
+        """)
+        # Wpisy są usuwane wyzwalaczami BEFORE, póki wiersz bookmarks_fts z tokenami do usunięcia jeszcze istnieje.
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_search_insert AFTER INSERT ON bookmarks
+            BEGIN
+                INSERT INTO bookmark_search (rowid, content, author_name, components_text, embed_text)
+                SELECT NEW.id, search_tokens(NEW.user_id, content), search_tokens(NEW.user_id, author_name),
+                       search_tokens(NEW.user_id, components_text), search_tokens(NEW.user_id, embed_text)
+                FROM bookmarks_fts WHERE rowid = NEW.snapshot_id;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_search_delete BEFORE DELETE ON bookmarks
+            BEGIN
+                INSERT INTO bookmark_search (bookmark_search, rowid, content, author_name, components_text, embed_text)
+                SELECT 'delete', OLD.id, search_tokens(OLD.user_id, content), search_tokens(OLD.user_id, author_name),
+                       search_tokens(OLD.user_id, components_text), search_tokens(OLD.user_id, embed_text)
+                FROM bookmarks_fts WHERE rowid = OLD.snapshot_id;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_search_unlink BEFORE UPDATE OF snapshot_id ON bookmarks
+            WHEN OLD.snapshot_id != NEW.snapshot_id
+            BEGIN
+                INSERT INTO bookmark_search (bookmark_search, rowid, content, author_name, components_text, embed_text)
+                SELECT 'delete', OLD.id, search_tokens(OLD.user_id, content), search_tokens(OLD.user_id, author_name),
+                       search_tokens(OLD.user_id, components_text), search_tokens(OLD.user_id, embed_text)
+                FROM bookmarks_fts WHERE rowid = OLD.snapshot_id;
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_search_link AFTER UPDATE OF snapshot_id ON bookmarks
+            WHEN OLD.snapshot_id != NEW.snapshot_id
+            BEGIN
+                INSERT INTO bookmark_search (rowid, content, author_name, components_text, embed_text)
+                SELECT NEW.id, search_tokens(NEW.user_id, content), search_tokens(NEW.user_id, author_name),
+                       search_tokens(NEW.user_id, components_text), search_tokens(NEW.user_id, embed_text)
+                FROM bookmarks_fts WHERE rowid = NEW.snapshot_id;
+            END
+        """)
+        conn.execute("""
+            INSERT INTO bookmark_search (rowid, content, author_name, components_text, embed_text)
+            SELECT b.id, search_tokens(b.user_id, f.content), search_tokens(b.user_id, f.author_name),
+                   search_tokens(b.user_id, f.components_text), search_tokens(b.user_id, f.embed_text)
+            FROM bookmarks b JOIN bookmarks_fts f ON f.rowid = b.snapshot_id
+        """)
+
+    def _migration_refresh_denormalized_columns(self, conn: sqlite3.Connection) -> None:
+        # Po przepięciu zakładki na nową migawkę filtry muszą widzieć te same dane co lista.
+        conn.execute("DROP TRIGGER trg_bookmarks_attachments_update")
+        conn.execute("""
+            CREATE TRIGGER trg_bookmarks_denormalized_update AFTER UPDATE OF snapshot_id ON bookmarks
+            BEGIN
+                UPDATE bookmarks SET
+                    guild_id = (SELECT guild_id FROM message_snapshots WHERE id = NEW.snapshot_id),
+                    author_name = (SELECT author_name FROM snapshot_summaries WHERE snapshot_id = NEW.snapshot_id),
+                    has_attachments = (
+                        SELECT image_count + file_count > 0 FROM snapshot_summaries WHERE snapshot_id = NEW.snapshot_id
+                    )
+                WHERE id = NEW.id;
+            END
+        """)
+        conn.execute("""
+            UPDATE bookmarks SET
+                guild_id = (SELECT guild_id FROM message_snapshots WHERE id = bookmarks.snapshot_id),
+                author_name = (SELECT author_name FROM snapshot_summaries WHERE snapshot_id = bookmarks.snapshot_id)
+        """)
+
+    def _migration_list_filter_expiry(self, conn: sqlite3.Connection) -> None:
+        conn.execute("ALTER TABLE list_filters ADD COLUMN used_at TEXT NOT NULL DEFAULT ''")
+        conn.execute("""
+            DELETE FROM list_filters WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id DESC) AS position FROM list_filters
+                )
+                WHERE position > ?
+            )
+        """, (MAX_LIST_FILTERS,))
+
+    @staticmethod
+    def _serialize_attachments(message) -> Optional[List[Dict]]:
+        if not message.attachments:
+            return None
+
+        return [
+            _attachment_entry(attachment.url, attachment.filename, getattr(attachment, "content_type", None),
+                              getattr(attachment, "size", 0))
+            for attachment in message.attachments
+        ]
+
+    @staticmethod
+    def _build_snapshot_row(message_id: int, channel_id: int, guild_id: int, content: Optional[str],
+                            embed_data: Optional[str], author_name: str, author_avatar: Optional[str], timestamp: str,
+                            attachments: Optional[List[Dict]], components_data: Optional[str],
+                            message_flags: int) -> Tuple[tuple, Tuple[str, str], Tuple[str, int, int]]:
+        attachments_data = json.dumps(attachments) if attachments else None
+        snapshot = (
+            message_id,
+            _snapshot_hash(channel_id, guild_id, content, embed_data, author_name, author_avatar, timestamp,
+                           attachments_data, components_data, message_flags),
+            channel_id,
+            guild_id,
+            content,
+            encode_payload(embed_data),
+            author_name,
+            author_avatar,
+            timestamp,
+            encode_payload(attachments_data),
+            encode_payload(components_data),
+            message_flags,
+            DEFAULT_CODEC
+        )
+        search_text = _extract_search_text(embed_data, components_data)
+        summary = (_build_preview(content), *_count_attachments(attachments))
+        return snapshot, search_text, summary
+
+    async def save_bookmark(self, user_id: int, message, embed_data: Optional[str], components_data: Optional[str],
+                            message_flags: int = 0, guild_id: int = 0) -> int:
+        author_avatar = message.author.display_avatar.url if message.author.display_avatar else None
+        snapshot, search_text, summary = self._build_snapshot_row(
+            message.id,
+            message.channel.id,
+            guild_id,
+            message.content,
+            embed_data,
+            message.author.display_name,
+            author_avatar,
+            message.created_at.isoformat(),
+            self._serialize_attachments(message),
+            components_data,
+            message_flags
+        )
+        row = (user_id, datetime.datetime.now(datetime.timezone.utc).isoformat(), snapshot, search_text, summary)
+        if self._save_flusher is None or self._save_flusher.done():
+            self._save_queue = asyncio.Queue()
+            self._save_flusher = asyncio.create_task(self._flush_saves())
+
+        future = asyncio.get_running_loop().create_future()
+        with metrics.timed("db"):
+            await self._save_queue.put((row, future))
+            bookmark_id = await future
+        self.cache.invalidate(("bookmark", user_id, bookmark_id))
+        self.cache.invalidate_tag(("pages", user_id))
+        self.suggestions.add(user_id, bookmark_id, message.author.display_name, summary[0])
+        return bookmark_id
+
+    async def _flush_saves(self) -> None:
+        metrics.detach()
+        loop = asyncio.get_running_loop()
+        queue = self._save_queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_max_delay
+            while len(batch) < self.batch_max_rows:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await self._run_write(self._save_bookmarks_batch, [row for row, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                queue.task_done()
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _save_bookmarks_batch(self, conn: sqlite3.Connection, rows: List[tuple]) -> List[Any]:
+        results = []
+        with conn:
+            conn.execute("BEGIN")
+            for row in rows:
+                conn.execute("SAVEPOINT save_row")
+                try:
+                    results.append(self._insert_bookmark(conn, row))
+                except self.backend.errors as e:
+                    conn.execute("ROLLBACK TO save_row")
+                    results.append(e)
+                conn.execute("RELEASE save_row")
+        return results
+
+    def _insert_bookmark(self, conn: sqlite3.Connection, row: tuple) -> int:
+        user_id, saved_at, snapshot, search_text, summary = row
+        snapshot_id = self._upsert_snapshot(conn, snapshot, search_text, summary)
+        existing = self._find_saved_bookmark(conn, user_id, snapshot[0])
+        if existing is None:
+            cursor = conn.execute(
+                """
+                INSERT INTO bookmarks (user_id, message_id, guild_id, author_name, has_attachments, snapshot_id, saved_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, message_id) DO NOTHING
+                """,
+                (user_id, snapshot[0], snapshot[3], snapshot[6], summary[1] + summary[2] > 0, snapshot_id, saved_at)
+            )
+            if cursor.rowcount:
+                return cursor.lastrowid
+            # Inny proces zdążył zapisać tę samą wiadomość.
+            existing = self._find_saved_bookmark(conn, user_id, snapshot[0])
+
+        bookmark_id, current_snapshot_id = existing
+        if current_snapshot_id != snapshot_id:
+            conn.execute("UPDATE bookmarks SET snapshot_id = ? WHERE id = ?", (snapshot_id, bookmark_id))
+        return bookmark_id
+
+    def _find_saved_bookmark(self, conn: sqlite3.Connection, user_id: int, message_id: int) -> Optional[Tuple[int, int]]:
+        return conn.execute(
+            "SELECT id, snapshot_id FROM bookmarks WHERE user_id = ? AND message_id = ?",
+            (user_id, message_id)
+        ).fetchone()
+
+    def _upsert_snapshot(self, conn: sqlite3.Connection, snapshot: tuple, search_text: Tuple[str, str],
+                         summary: Tuple[str, int, int]) -> int:
+        cursor = conn.execute(f"""
+            INSERT INTO message_snapshots ({SNAPSHOT_COLUMNS})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (message_id, content_hash) DO NOTHING
+        """, snapshot)
+        if cursor.rowcount:
+            conn.execute(
+                "INSERT INTO bookmarks_fts (rowid, content, author_name, components_text, embed_text) VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, snapshot[4], snapshot[6], *search_text)
+            )
+            conn.execute(
+                "INSERT INTO snapshot_summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (cursor.lastrowid, snapshot[6], snapshot[8], *summary)
+            )
+            return cursor.lastrowid
+
+        return conn.execute(
+            "SELECT id FROM message_snapshots WHERE message_id = ? AND content_hash = ?",
+            (snapshot[0], snapshot[1])
+        ).fetchone()[0]
+
+    async def get_bookmark_summaries(self, user_id: int, page: int = 1, before_id: Optional[int] = None,
+                                     after_id: Optional[int] = None, per_page: int = 10,
+                                     filters: Optional[BookmarkFilter] = None) -> Tuple[List[BookmarkSummary], int]:
+        if filters is not None and not filters.active:
+            filters = None
+        cursor_page = page if before_id is None and after_id is None else None
+        key = ("summaries", user_id, cursor_page, before_id, after_id, per_page, filters)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation
+        if filters is None:
+            result = await self._run_read(self._get_bookmark_summaries, user_id, page, before_id, after_id, per_page)
+        else:
+            result = await self._run_read(self._get_filtered_summaries, user_id, page, before_id, after_id, per_page, filters)
+        self.cache.set(key, result, tag=("pages", user_id), generation=generation)
+        return result
+
+    def _get_bookmark_summaries(self, conn: sqlite3.Connection, user_id: int, page: int, before_id: Optional[int],
+                                after_id: Optional[int], per_page: int) -> Tuple[List[BookmarkSummary], int]:
+        if before_id is not None:
+            rows = conn.execute(f"""
+                {SELECT_SUMMARIES}
+                WHERE b.user_id = ? AND b.id < ?
+                ORDER BY b.id DESC
+                LIMIT ?
+            """, (user_id, before_id, per_page)).fetchall()
+        elif after_id is not None:
+            rows = conn.execute(f"""
+                {SELECT_SUMMARIES}
+                WHERE b.user_id = ? AND b.id > ?
+                ORDER BY b.id ASC
+                LIMIT ?
+            """, (user_id, after_id, per_page)).fetchall()
+            rows.reverse()
+        else:
+            rows = conn.execute(f"""
+                {SELECT_SUMMARIES}
+                WHERE b.user_id = ?
+                ORDER BY b.id DESC
+                LIMIT ? OFFSET ?
+            """, (user_id, per_page, (max(page, 1) - 1) * per_page)).fetchall()
+        return [BookmarkSummary._make(row) for row in rows], self._get_bookmark_count(conn, user_id)
+
+    def _get_filtered_summaries(self, conn: sqlite3.Connection, user_id: int, page: int, before_id: Optional[int],
+                                after_id: Optional[int], per_page: int,
+                                filters: BookmarkFilter) -> Tuple[List[BookmarkSummary], int]:
+        if filters.tag is not None:
+            # Klucz główny (tag_id, bookmark_id) daje uporządkowany przebieg po zakładkach z danym tagiem.
+            source = (
+                "bookmark_tags bt CROSS JOIN bookmarks b ON b.id = bt.bookmark_id "
+                "JOIN snapshot_summaries ss ON ss.snapshot_id = b.snapshot_id"
+            )
+            key = "bt.bookmark_id"
+            conditions = ["bt.tag_id = (SELECT id FROM tags WHERE user_id = ? AND name = ?)", "b.user_id = ?"]
+            params: List[Any] = [user_id, filters.tag, user_id]
+        else:
+            source = "bookmarks b JOIN snapshot_summaries ss ON ss.snapshot_id = b.snapshot_id"
+            key = "b.id"
+            conditions = ["b.user_id = ?"]
+            params = [user_id]
+
+        if filters.guild_id is not None:
+            conditions.append("b.guild_id = ?")
+            params.append(filters.guild_id)
+        if filters.author_name is not None:
+            conditions.append("b.author_name = ?")
+            params.append(filters.author_name)
+        if filters.saved_after is not None:
+            conditions.append("b.saved_at >= ?")
+            params.append(filters.saved_after)
+        if filters.saved_before is not None:
+            conditions.append("b.saved_at < ?")
+            params.append(filters.saved_before)
+        if filters.has_attachments:
+            conditions.append("b.has_attachments = 1")
+
+        where = " AND ".join(conditions)
+        select = f"SELECT {SUMMARY_COLUMNS} FROM {source} WHERE {where}"
+        if before_id is not None:
+            rows = conn.execute(f"{select} AND {key} < ? ORDER BY {key} DESC LIMIT ?", (*params, before_id, per_page)).fetchall()
+        elif after_id is not None:
+            rows = conn.execute(f"{select} AND {key} > ? ORDER BY {key} ASC LIMIT ?", (*params, after_id, per_page)).fetchall()
+            rows.reverse()
+        else:
+            rows = conn.execute(
+                f"{select} ORDER BY {key} DESC LIMIT ? OFFSET ?",
+                (*params, per_page, (max(page, 1) - 1) * per_page)
+            ).fetchall()
+        total = conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+        return [BookmarkSummary._make(row) for row in rows], total
+
+    async def get_bookmark_count(self, user_id: int) -> int:
+        return await self._run_read(self._get_bookmark_count, user_id)
+
+    def _get_bookmark_count(self, conn: sqlite3.Connection, user_id: int) -> int:
+        row = conn.execute("SELECT total FROM user_bookmark_counts WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    async def get_bookmark_by_id(self, bookmark_id: int, user_id: int) -> Optional[Bookmark]:
+        key = ("bookmark", user_id, bookmark_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self.cache.generation
+        bookmark = await self._run_read(self._get_bookmark_by_id, bookmark_id, user_id)
+        if bookmark is not None:
+            self.cache.set(key, bookmark, tag=("bookmarks", user_id), generation=generation)
+        return bookmark
+
+    def _get_bookmark_by_id(self, conn: sqlite3.Connection, bookmark_id: int, user_id: int) -> Optional[Bookmark]:
+        row = conn.execute(
+            f"{SELECT_BOOKMARKS} WHERE b.id = ? AND b.user_id = ?",
+            (bookmark_id, user_id)
+        ).fetchone()
+        return Bookmark.from_row(row) if row else None
+
+    async def suggest_bookmarks(self, user_id: int, query: str, limit: int = 25) -> List[Tuple[int, str]]:
+        suggestions = self.suggestions.search(user_id, query, limit)
+        if suggestions is not None:
+            return suggestions
+
+        generation = self.cache.generation
+        rows = await self._run_read(self._get_suggestion_rows, user_id, self.suggestions.max_user_entries)
+        self.suggestions.load(user_id, rows)
+        suggestions = self.suggestions.search(user_id, query, limit)
+        if generation != self.cache.generation:
+            self.suggestions.drop(user_id)
+        return suggestions
+
+    def _get_suggestion_rows(self, conn: sqlite3.Connection, user_id: int, limit: int) -> List[Tuple[int, str, str]]:
+        return conn.execute("""
+            SELECT b.id, ss.author_name, ss.preview FROM bookmarks b
+            JOIN snapshot_summaries ss ON ss.snapshot_id = b.snapshot_id
+            WHERE b.user_id = ?
+            ORDER BY b.id DESC
+            LIMIT ?
+        """, (user_id, limit)).fetchall()
+
+    async def search_bookmarks(self, user_id: int, query: str, page: int = 1,
+                               per_page: int = 10) -> Tuple[List[BookmarkSummary], int]:
+        return await self._run_read(self._search_bookmarks, user_id, query, page, per_page)
+
+    def _search_bookmarks(self, conn: sqlite3.Connection, user_id: int, query: str, page: int,
+                          per_page: int) -> Tuple[List[BookmarkSummary], int]:
+        search_query = _build_search_query(user_id, query)
+        if not search_query:
+            return [], 0
+
+        # Ranking liczony jest w podzapytaniu, żeby złączenia dotyczyły tylko wierszy jednej strony.
+        rows = conn.execute(f"""
+            SELECT {SUMMARY_COLUMNS} FROM (
+                SELECT rowid, bm25(bookmark_search, 1.0, 0.5, 1.0, 0.75) AS score FROM bookmark_search
+                WHERE bookmark_search MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            ) hits
+            CROSS JOIN bookmarks b ON b.id = hits.rowid
+            CROSS JOIN snapshot_summaries ss ON ss.snapshot_id = b.snapshot_id
+            WHERE b.user_id = ?
+            ORDER BY hits.score
+        """, (search_query, per_page, (max(page, 1) - 1) * per_page, user_id)).fetchall()
+        total = conn.execute("SELECT COUNT(*) FROM bookmark_search WHERE bookmark_search MATCH ?", (search_query,)).fetchone()[0]
+        return [BookmarkSummary._make(row) for row in rows], total
+
+    def _iter_bookmarks(self, conn: sqlite3.Connection, user_id: int, batch_size: int = 500) -> Iterator[Bookmark]:
+        cursor = conn.execute(f"{SELECT_BOOKMARKS} WHERE b.user_id = ? ORDER BY b.id", (user_id,))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield Bookmark.from_row(row)
+        finally:
+            cursor.close()
+
+    async def export_bookmarks(self, user_id: int, fileobj: BinaryIO, batch_size: int = 500) -> int:
+        return await self._run_read(self._export_bookmarks, user_id, fileobj, batch_size)
+
+    def _export_bookmarks(self, conn: sqlite3.Connection, user_id: int, fileobj: BinaryIO, batch_size: int) -> int:
+        bookmarks = self._iter_bookmarks(conn, user_id, batch_size)
+        try:
+            return write_export(bookmarks, fileobj)
+        finally:
+            # Po błędzie dekodowania kursor musi zostać zamknięty w wątku czytającym, a nie dopiero przy sprzątaniu generatora.
+            bookmarks.close()
+
+    def queue_render_data(self, bookmark: Bookmark, render_data: str) -> None:
+        bookmark.render_data = render_data
+        if bookmark.snapshot_id is None:
+            return
+        # Render powstał z migawki odczytanej razem z zakładką; zakładka mogła od tego czasu wskazywać już inną migawkę.
+        self._write_executor.submit(self._with_connection, self._store_render_data, (bookmark.snapshot_id, render_data))
+
+    def _store_render_data(self, conn: sqlite3.Connection, snapshot_id: int, render_data: str) -> None:
+        with conn:
+            conn.execute("UPDATE message_snapshots SET render_data = ? WHERE id = ?", (render_data, snapshot_id))
+
+    async def migrate_payloads(self, batch_size: int = 200, pause: float = 0.5) -> int:
+        migrated = 0
+        last_id = 0
+        while True:
+            count, last_id = await self._run_write(self._migrate_payload_batch, last_id, batch_size)
+            migrated += count
+            if last_id is None:
+                return migrated
+            await asyncio.sleep(pause)
+
+    def _migrate_payload_batch(self, conn: sqlite3.Connection, last_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        rows = conn.execute("""
+            SELECT id, embed_data, attachments_data, components_data FROM message_snapshots
+            WHERE id > ? AND payload_codec = ?
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, CODEC_JSON, batch_size)).fetchall()
+        if not rows:
+            return 0, None
+
+        updates = []
+        for snapshot_id, embed_data, attachments_data, components_data in rows:
+            try:
+                updates.append((
+                    encode_payload(embed_data),
+                    encode_payload(attachments_data),
+                    encode_payload(components_data),
+                    DEFAULT_CODEC,
+                    snapshot_id
+                ))
+            except (ValueError, TypeError) as e:
+                print(f"Błąd migracji danych zakładki (snapshot {snapshot_id}): {e}")
+
+        with conn:
+            conn.executemany(f"""
+                UPDATE message_snapshots
+                SET embed_data = ?, attachments_data = ?, components_data = ?, payload_codec = ?
+                WHERE id = ? AND payload_codec = {CODEC_JSON}
+            """, updates)
+        return len(updates), rows[-1][0]
+
+    async def delete_bookmark(self, bookmark_id: int, user_id: int) -> Tuple[bool, str]:
+        result = await self._run_write(self._delete_bookmark, bookmark_id, user_id)
+        self.cache.invalidate(("bookmark", user_id, bookmark_id))
+        self.cache.invalidate_tag(("pages", user_id))
+        self.suggestions.discard(user_id, (bookmark_id,))
+        return result
+
+    def _delete_bookmark(self, conn: sqlite3.Connection, bookmark_id: int, user_id: int) -> Tuple[bool, str]:
+        with conn:
+            cursor = conn.execute("DELETE FROM bookmarks WHERE id = ? AND user_id = ?", (bookmark_id, user_id))
+        if cursor.rowcount == 0:
+            return False, "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu."
+        return True, f"Usunięto zakładkę #{bookmark_id}."
+
+    async def delete_bookmarks(self, bookmark_ids: Iterable[int], user_id: int) -> int:
+        bookmark_ids = sorted({int(bookmark_id) for bookmark_id in bookmark_ids})
+        if not bookmark_ids:
+            return 0
+
+        deleted = await self._run_write(self._delete_bookmarks, bookmark_ids, user_id)
+        self._invalidate_user(user_id)
+        return deleted
+
+    def _delete_bookmarks(self, conn: sqlite3.Connection, bookmark_ids: List[int], user_id: int) -> int:
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM bookmarks WHERE user_id = ? AND id IN (SELECT value FROM json_each(?))",
+                (user_id, json.dumps(bookmark_ids))
+            )
+        return cursor.rowcount
+
+    async def delete_bookmarks_by_filter(self, user_id: int, author_name: Optional[str] = None,
+                                         guild_id: Optional[int] = None,
+                                         saved_after: Optional[datetime.datetime] = None,
+                                         saved_before: Optional[datetime.datetime] = None) -> int:
+        conditions = ["user_id = ?"]
+        params: List[Any] = [user_id]
+        if saved_after is not None:
+            conditions.append("saved_at >= ?")
+            params.append(saved_after.astimezone(datetime.timezone.utc).isoformat())
+        if saved_before is not None:
+            conditions.append("saved_at < ?")
+            params.append(saved_before.astimezone(datetime.timezone.utc).isoformat())
+        if guild_id is not None:
+            conditions.append("guild_id = ?")
+            params.append(guild_id)
+        if author_name is not None:
+            conditions.append("author_name = ?")
+            params.append(author_name)
+
+        deleted = await self._run_write(self._delete_bookmarks_where, " AND ".join(conditions), params)
+        self._invalidate_user(user_id)
+        return deleted
+
+    def _delete_bookmarks_where(self, conn: sqlite3.Connection, where: str, params: List[Any]) -> int:
+        with conn:
+            cursor = conn.execute(f"DELETE FROM bookmarks WHERE {where}", params)
+        return cursor.rowcount
+
+    async def import_bookmarks(self, user_id: int, records: Iterable[Dict[str, Any]], batch_size: int = 500) -> int:
+        imported = 0
+        records = iter(records)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # Rekordy mogą pochodzić z rozpakowywanego strumienia, więc każda paczka jest parsowana poza pętlą zdarzeń.
+                batch = await loop.run_in_executor(None, list, itertools.islice(records, batch_size))
+                if not batch:
+                    return imported
+                imported += await self._run_write(self._import_bookmarks_batch, user_id, batch)
+        finally:
+            if imported:
+                self._invalidate_user(user_id)
+
+    def _import_bookmarks_batch(self, conn: sqlite3.Connection, user_id: int, records: List[Dict[str, Any]]) -> int:
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        snapshots = {}
+        bookmarks = []
+        tags = []
+        for record in records:
+            embeds = record.get("embeds")
+            components = record.get("components")
+            attachments = [
+                _attachment_entry(attachment["url"], attachment["filename"], attachment.get("content_type"),
+                                  attachment.get("size"))
+                for attachment in record.get("attachments") or ()
+            ]
+            snapshot, search_text, summary = self._build_snapshot_row(
+                int(record["message_id"]),
+                int(record["channel_id"]),
+                int(record.get("guild_id") or 0),
+                record.get("content"),
+                json.dumps(embeds) if embeds else None,
+                record.get("author_name"),
+                record.get("author_avatar"),
+                record["timestamp"],
+                attachments or None,
+                json.dumps(components) if components else None,
+                int(record.get("message_flags") or 0)
+            )
+            key = (snapshot[0], snapshot[1])
+            snapshots.setdefault(key, (snapshot, search_text, summary))
+            bookmarks.append((user_id, record.get("saved_at") or now, *key))
+            tags.extend((snapshot[0], tag) for tag in normalize_tags(record.get("tags") or ()))
+
+        with conn:
+            conn.execute("BEGIN")
+            last_snapshot_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM message_snapshots").fetchone()[0]
+            conn.executemany(f"""
+                INSERT INTO message_snapshots ({SNAPSHOT_COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (message_id, content_hash) DO NOTHING
+            """, (snapshot for snapshot, _, _ in snapshots.values()))
+            conn.executemany("""
+                INSERT INTO bookmarks_fts (rowid, content, author_name, components_text, embed_text)
+                SELECT id, content, author_name, ?, ? FROM message_snapshots
+                WHERE message_id = ? AND content_hash = ? AND id > ?
+            """, ((*search_text, *key, last_snapshot_id) for key, (_, search_text, _) in snapshots.items()))
+            conn.executemany("""
+                INSERT INTO snapshot_summaries
+                SELECT id, author_name, timestamp, ?, ?, ? FROM message_snapshots
+                WHERE message_id = ? AND content_hash = ? AND id > ?
+            """, ((*summary, *key, last_snapshot_id) for key, (_, _, summary) in snapshots.items()))
+            cursor = conn.executemany("""
+                INSERT INTO bookmarks (user_id, message_id, guild_id, author_name, has_attachments, snapshot_id, saved_at)
+                SELECT ?, s.message_id, s.guild_id, s.author_name, ss.image_count + ss.file_count > 0, s.id, ?
+                FROM message_snapshots s JOIN snapshot_summaries ss ON ss.snapshot_id = s.id
+                WHERE s.message_id = ? AND s.content_hash = ?
+                ON CONFLICT (user_id, message_id) DO NOTHING
+            """, bookmarks)
+            imported = cursor.rowcount
+            # Migawki wiadomości, które użytkownik już miał, nie trafiły do żadnej zakładki.
+            conn.execute("DELETE FROM message_snapshots WHERE id > ? AND refcount <= 0", (last_snapshot_id,))
+            if tags:
+                conn.executemany(
+                    "INSERT INTO tags (user_id, name) VALUES (?, ?) ON CONFLICT (user_id, name) DO NOTHING",
+                    {(user_id, tag) for _, tag in tags}
+                )
+                conn.executemany("""
+                    INSERT INTO bookmark_tags (tag_id, bookmark_id)
+                    SELECT t.id, b.id FROM bookmarks b JOIN tags t ON t.user_id = b.user_id
+                    WHERE b.user_id = ? AND b.message_id = ? AND t.name = ?
+                    ON CONFLICT (tag_id, bookmark_id) DO NOTHING
+                """, ((user_id, message_id, tag) for message_id, tag in tags))
+        return imported
+
+    async def apply_source_changes(self, edits: Dict[int, Dict[str, Any]], deleted: Iterable[int]) -> Tuple[int, int]:
+        deleted = sorted(deleted)
+        if not edits and not deleted:
+            return 0, 0
+
+        updated, marked, user_ids = await self._run_write(self._apply_source_changes, edits, deleted)
+        for user_id in user_ids:
+            self._invalidate_user(user_id)
+        return updated, marked
+
+    def _apply_source_changes(self, conn: sqlite3.Connection, edits: Dict[int, Dict[str, Any]],
+                              deleted: List[int]) -> Tuple[int, int, set]:
+        user_ids = set()
+        updated = 0
+        marked = 0
+        with conn:
+            conn.execute("BEGIN")
+            bookmarks: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+            if edits:
+                rows = conn.execute(
+                    "SELECT id, user_id, message_id, snapshot_id FROM bookmarks WHERE message_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(edits)),)
+                )
+                for bookmark_id, user_id, message_id, snapshot_id in rows.fetchall():
+                    bookmarks.setdefault((message_id, snapshot_id), []).append((bookmark_id, user_id))
+
+            for (message_id, base_id), base_bookmarks in sorted(bookmarks.items()):
+                # Każda migawka bazowa jest edytowana osobno, żeby pola spoza zdarzenia (autor, kanał, data)
+                # pochodziły z migawki danej zakładki, a nie z cudzego, np. zaimportowanego zapisu.
+                base = conn.execute(
+                    f"SELECT {SNAPSHOT_COLUMNS}, source_deleted_at FROM message_snapshots WHERE id = ?",
+                    (base_id,)
+                ).fetchone()
+                if base is None or base[-1] is not None:
+                    continue
+                snapshot_id = self._upsert_snapshot(conn, *self._build_edited_snapshot(base[:-1], edits[message_id]))
+                if snapshot_id == base_id:
+                    continue
+                conn.executemany("UPDATE bookmarks SET snapshot_id = ? WHERE id = ?",
+                                 ((snapshot_id, bookmark_id) for bookmark_id, _ in base_bookmarks))
+                updated += len(base_bookmarks)
+                user_ids.update(user_id for _, user_id in base_bookmarks)
+
+            if deleted:
+                deleted_json = json.dumps(deleted)
+                rows = conn.execute("""
+                    SELECT b.user_id FROM bookmarks b JOIN message_snapshots s ON s.id = b.snapshot_id
+                    WHERE b.message_id IN (SELECT value FROM json_each(?)) AND s.source_deleted_at IS NULL
+                """, (deleted_json,)).fetchall()
+                if rows:
+                    conn.execute(
+                        "UPDATE message_snapshots SET source_deleted_at = ? "
+                        "WHERE message_id IN (SELECT value FROM json_each(?)) AND source_deleted_at IS NULL",
+                        (datetime.datetime.now(datetime.timezone.utc).isoformat(), deleted_json)
+                    )
+                    marked = len(rows)
+                    deleted_users = {user_id for user_id, in rows}
+                    # Zmiana samej migawki nie uruchamia wyzwalaczy na bookmarks, więc inne procesy trzeba powiadomić ręcznie.
+                    conn.executemany(BUMP_INVALIDATION, ((user_id,) for user_id in deleted_users))
+                    user_ids.update(deleted_users)
+        return updated, marked, user_ids
+
+    def _build_edited_snapshot(self, base: tuple, data: Dict[str, Any]) -> Tuple[tuple, Tuple[str, str], Tuple[str, int, int]]:
+        (message_id, _, channel_id, guild_id, content, embed_data, author_name, author_avatar, timestamp,
+         attachments_data, components_data, message_flags, payload_codec) = base
+
+        if "embeds" in data:
+            embeds = data["embeds"]
+        else:
+            embeds = decode_payload(embed_data, payload_codec)
+        if "attachments" in data:
+            attachments = [
+                _attachment_entry(attachment["url"], attachment["filename"], attachment.get("content_type"),
+                                  attachment.get("size"))
+                for attachment in data["attachments"]
+            ]
+        else:
+            attachments = decode_payload(attachments_data, payload_codec)
+        if "components" in data:
+            components = data["components"]
+        else:
+            components = decode_payload(components_data, payload_codec)
+
+        return self._build_snapshot_row(
+            message_id,
+            channel_id,
+            guild_id,
+            data.get("content", content),
+            json.dumps(embeds) if embeds else None,
+            author_name,
+            author_avatar,
+            timestamp,
+            attachments or None,
+            json.dumps(components) if components else None,
+            int(data.get("flags", message_flags) or 0)
+        )
+
+    async def add_reminder(self, user_id: int, bookmark_id: int, due_at: float) -> Optional[Reminder]:
+        return await self._run_write(self._add_reminder, user_id, bookmark_id, due_at)
+
+    def _add_reminder(self, conn: sqlite3.Connection, user_id: int, bookmark_id: int, due_at: float) -> Optional[Reminder]:
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO reminders (user_id, bookmark_id, due_at, created_at)
+                SELECT user_id, id, ?, ? FROM bookmarks WHERE id = ? AND user_id = ?
+                ON CONFLICT (bookmark_id) DO UPDATE SET due_at = excluded.due_at
+            """, (due_at, datetime.datetime.now(datetime.timezone.utc).isoformat(), bookmark_id, user_id))
+        if not cursor.rowcount:
+            return None
+        row = conn.execute("SELECT id, user_id, bookmark_id, due_at FROM reminders WHERE bookmark_id = ?", (bookmark_id,)).fetchone()
+        return Reminder._make(row)
+
+    async def count_reminders(self, user_id: int, except_bookmark_id: Optional[int] = None) -> int:
+        return await self._run_read(self._count_reminders, user_id, except_bookmark_id)
+
+    def _count_reminders(self, conn: sqlite3.Connection, user_id: int, except_bookmark_id: Optional[int]) -> int:
+        return conn.execute(
+            "SELECT COUNT(*) FROM reminders WHERE user_id = ? AND bookmark_id IS NOT ?", (user_id, except_bookmark_id)
+        ).fetchone()[0]
+
+    async def get_upcoming_reminders(self, until: float, limit: int) -> List[Reminder]:
+        return await self._run_read(self._get_upcoming_reminders, until, limit)
+
+    def _get_upcoming_reminders(self, conn: sqlite3.Connection, until: float, limit: int) -> List[Reminder]:
+        rows = conn.execute("""
+            SELECT id, user_id, bookmark_id, due_at FROM reminders
+            WHERE due_at <= ?
+            ORDER BY due_at, id
+            LIMIT ?
+        """, (until, limit)).fetchall()
+        return [Reminder._make(row) for row in rows]
+
+    async def claim_reminders(self, reminders: Iterable[Reminder]) -> List[Reminder]:
+        reminders = list(reminders)
+        if not reminders:
+            return []
+        return await self._run_write(self._claim_reminders, reminders)
+
+    def _claim_reminders(self, conn: sqlite3.Connection, reminders: List[Reminder]) -> List[Reminder]:
+        claimed = []
+        with conn:
+            conn.execute("BEGIN")
+            for reminder in reminders:
+                # Warunek na due_at pomija przypomnienia przełożone po załadowaniu do kopca.
+                cursor = conn.execute("DELETE FROM reminders WHERE id = ? AND due_at <= ?", (reminder.id, reminder.due_at))
+                if cursor.rowcount:
+                    claimed.append(reminder)
+        return claimed
+
+    async def get_bookmark_tags(self, bookmark_id: int, user_id: int) -> Optional[List[str]]:
+        return await self._run_read(self._get_bookmark_tags, bookmark_id, user_id)
+
+    def _get_bookmark_tags(self, conn: sqlite3.Connection, bookmark_id: int, user_id: int) -> Optional[List[str]]:
+        if conn.execute("SELECT 1 FROM bookmarks WHERE id = ? AND user_id = ?", (bookmark_id, user_id)).fetchone() is None:
+            return None
+        rows = conn.execute("""
+            SELECT t.name FROM bookmark_tags bt JOIN tags t ON t.id = bt.tag_id
+            WHERE bt.bookmark_id = ? ORDER BY t.name
+        """, (bookmark_id,)).fetchall()
+        return [name for name, in rows]
+
+    async def set_bookmark_tags(self, bookmark_id: int, user_id: int, names: Iterable[str]) -> Optional[List[str]]:
+        tags = await self._run_write(self._set_bookmark_tags, bookmark_id, user_id, normalize_tags(names))
+        if tags is not None:
+            self.cache.invalidate(("bookmark", user_id, bookmark_id))
+            self.cache.invalidate_tag(("pages", user_id))
+        return tags
+
+    def _set_bookmark_tags(self, conn: sqlite3.Connection, bookmark_id: int, user_id: int,
+                           tags: List[str]) -> Optional[List[str]]:
+        with conn:
+            conn.execute("BEGIN")
+            if conn.execute("SELECT 1 FROM bookmarks WHERE id = ? AND user_id = ?", (bookmark_id, user_id)).fetchone() is None:
+                return None
+            conn.execute("DELETE FROM bookmark_tags WHERE bookmark_id = ?", (bookmark_id,))
+            if tags:
+                conn.executemany(
+                    "INSERT INTO tags (user_id, name) VALUES (?, ?) ON CONFLICT (user_id, name) DO NOTHING",
+                    ((user_id, tag) for tag in tags)
+                )
+                conn.execute("""
+                    INSERT INTO bookmark_tags (tag_id, bookmark_id)
+                    SELECT id, ? FROM tags WHERE user_id = ? AND name IN (SELECT value FROM json_each(?))
+                """, (bookmark_id, user_id, json.dumps(tags)))
+            conn.execute("""
+                DELETE FROM tags WHERE user_id = ?
+                AND NOT EXISTS (SELECT 1 FROM bookmark_tags WHERE tag_id = tags.id)
+            """, (user_id,))
+            # Tagi nie zmieniają wierszy bookmarks, więc wyzwalacze nie powiadomią innych procesów.
+            conn.execute(BUMP_INVALIDATION, (user_id,))
+        return sorted(tags)
+
+    async def get_tag_names(self, user_id: int, query: str = "", limit: int = 25) -> List[str]:
+        return await self._run_read(self._get_tag_names, user_id, query.strip().lower(), limit)
+
+    def _get_tag_names(self, conn: sqlite3.Connection, user_id: int, query: str, limit: int) -> List[str]:
+        rows = conn.execute(
+            "SELECT name FROM tags WHERE user_id = ? AND instr(name, ?) > 0 ORDER BY name LIMIT ?",
+            (user_id, query, limit)
+        ).fetchall()
+        return [name for name, in rows]
+
+    async def save_list_filter(self, user_id: int, filters: BookmarkFilter) -> int:
+        return await self._run_write(self._save_list_filter, user_id, json.dumps(list(filters)))
+
+    def _save_list_filter(self, conn: sqlite3.Connection, user_id: int, spec: str) -> int:
+        now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("""
+                INSERT INTO list_filters (user_id, spec, used_at) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, spec) DO UPDATE SET used_at = excluded.used_at
+            """, (user_id, spec, now))
+            filter_id = conn.execute("SELECT id FROM list_filters WHERE user_id = ? AND spec = ?", (user_id, spec)).fetchone()[0]
+            # Przyciski starszych list tracą filtr, ale tabela nie rośnie z każdą nową kombinacją filtrów.
+            conn.execute("""
+                DELETE FROM list_filters WHERE user_id = ? AND id NOT IN (
+                    SELECT id FROM list_filters WHERE user_id = ? ORDER BY used_at DESC, id DESC LIMIT ?
+                )
+            """, (user_id, user_id, MAX_LIST_FILTERS))
+        return filter_id
+
+    async def get_list_filter(self, filter_id: int, user_id: int) -> Optional[BookmarkFilter]:
+        key = ("filter", user_id, filter_id)
+        filters = self.cache.get(key)
+        if filters is None:
+            filters = await self._run_read(self._get_list_filter, filter_id, user_id)
+            if filters is not None:
+                self.cache.set(key, filters)
+        return filters
+
+    def _get_list_filter(self, conn: sqlite3.Connection, filter_id: int, user_id: int) -> Optional[BookmarkFilter]:
+        row = conn.execute("SELECT spec FROM list_filters WHERE id = ? AND user_id = ?", (filter_id, user_id)).fetchone()
+        return BookmarkFilter(*json.loads(row[0])) if row else None
+
+    async def save_attachment_mirror(self, url_key: str, blob_hash: str, filename: str, content_type: Optional[str],
+                                     size: int) -> None:
+        await self._run_write(self._save_attachment_mirror, url_key, blob_hash, filename, content_type, size)
+
+    def _save_attachment_mirror(self, conn: sqlite3.Connection, url_key: str, blob_hash: str, filename: str,
+                                content_type: Optional[str], size: int) -> None:
+        with conn:
+            conn.execute("""
+                INSERT INTO attachment_mirrors (url_key, blob_hash, filename, content_type, size, mirrored_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url_key) DO UPDATE SET
+                    blob_hash = excluded.blob_hash, size = excluded.size, mirrored_at = excluded.mirrored_at
+            """, (url_key, blob_hash, filename, content_type, size, datetime.datetime.now(datetime.timezone.utc).isoformat()))
+
+    async def get_attachment_mirrors(self, url_keys: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        url_keys = list(url_keys)
+        if not url_keys:
+            return {}
+        return await self._run_read(self._get_attachment_mirrors, url_keys)
+
+    def _get_attachment_mirrors(self, conn: sqlite3.Connection, url_keys: List[str]) -> Dict[str, Tuple[str, str]]:
+        rows = conn.execute(
+            "SELECT url_key, blob_hash, filename FROM attachment_mirrors WHERE url_key IN (SELECT value FROM json_each(?))",
+            (json.dumps(url_keys),)
+        ).fetchall()
+        return {url_key: (blob_hash, filename) for url_key, blob_hash, filename in rows}
+
+    def _invalidate_user(self, user_id: int) -> None:
+        self.cache.invalidate_tag(("bookmarks", user_id))
+        self.cache.invalidate_tag(("pages", user_id))
+        self.suggestions.drop(user_id)
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self.cache.stats()
+
+    async def start_invalidation_listener(self) -> None:
+        if self._invalidation_listener is not None and not self._invalidation_listener.done():
+            return
+        last_seq = await self._run_read(self._latest_invalidation)
+        self._invalidation_listener = asyncio.create_task(self._listen_invalidations(last_seq))
+
+    async def _listen_invalidations(self, last_seq: int) -> None:
+        metrics.detach()
+        while True:
+            await asyncio.sleep(self.invalidation_interval)
+            try:
+                rows = await self._run_read(self._poll_invalidations, last_seq)
+            except self.backend.errors as e:
+                print(f"Błąd odczytu unieważnień cache: {e}")
+                continue
+            for user_id, seq in rows:
+                self._invalidate_user(user_id)
+                last_seq = max(last_seq, seq)
+
+    def _latest_invalidation(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM cache_invalidations").fetchone()[0]
+
+    def _poll_invalidations(self, conn: sqlite3.Connection, last_seq: int) -> List[Tuple[int, int]]:
+        return conn.execute(
+            "SELECT user_id, seq FROM cache_invalidations WHERE seq > ? ORDER BY seq",
+            (last_seq,)
+        ).fetchall()
+
+    async def close(self) -> None:
+        if self._invalidation_listener is not None:
+            self._invalidation_listener.cancel()
+            self._invalidation_listener = None
+        if self._save_flusher is not None:
+            await self._save_queue.join()
+            self._save_flusher.cancel()
+            self._save_flusher = None
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
@@ -0,0 +1,112 @@
+import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from database.codec import CODEC_JSON, decode_payload
+
+_UNSET = object()
+
+
+class BookmarkSummary(NamedTuple):
+    id: int
+    author_name: str
+    timestamp: str
+    preview: str
+    image_count: int
+    file_count: int
+
+
+class BookmarkFilter(NamedTuple):
+    tag: Optional[str] = None
+    guild_id: Optional[int] = None
+    author_name: Optional[str] = None
+    saved_after: Optional[str] = None
+    saved_before: Optional[str] = None
+    has_attachments: bool = False
+
+    @property
+    def active(self) -> bool:
+        return any(value not in (None, False) for value in self)
+
+
+class Reminder(NamedTuple):
+    id: int
+    user_id: int
+    bookmark_id: int
+    due_at: float
+
+
+class Bookmark:
+    __slots__ = (
+        "id", "user_id", "message_id", "channel_id", "guild_id", "content", "embed_data", "author_name",
+        "author_avatar", "timestamp", "saved_at", "attachments_data", "components_data", "message_flags",
+        "render_data", "payload_codec", "source_deleted_at", "tags", "snapshot_id", "render_cache", "_embeds", "_attachments", "_components", "_created_at"
+    )
+
+    def __init__(self, id: int, user_id: int, message_id: int, channel_id: int, guild_id: int, content: Optional[str],
+                 embed_data: Optional[Union[str, bytes]], author_name: str, author_avatar: Optional[str], timestamp: str,
+                 saved_at: str, attachments_data: Optional[Union[str, bytes]], components_data: Optional[Union[str, bytes]],
+                 message_flags: int = 0, render_data: Optional[str] = None, payload_codec: int = CODEC_JSON,
+                 source_deleted_at: Optional[str] = None, tags: Optional[str] = None, snapshot_id: Optional[int] = None):
+        self.id = id
+        self.user_id = user_id
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.content = content
+        self.embed_data = embed_data
+        self.author_name = author_name
+        self.author_avatar = author_avatar
+        self.timestamp = timestamp
+        self.saved_at = saved_at
+        self.attachments_data = attachments_data
+        self.components_data = components_data
+        self.message_flags = message_flags or 0
+        self.render_data = render_data
+        self.payload_codec = payload_codec
+        self.source_deleted_at = source_deleted_at
+        self.tags = sorted(tags.split(",")) if tags else []
+        self.snapshot_id = snapshot_id
+        self.render_cache: Optional[Dict[str, Any]] = None
+        self._embeds = _UNSET
+        self._attachments = _UNSET
+        self._components = _UNSET
+        self._created_at = None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Bookmark":
+        return cls(*row)
+
+    def __repr__(self) -> str:
+        return f"<Bookmark id={self.id} user_id={self.user_id} message_id={self.message_id}>"
+
+    @property
+    def is_components_v2(self) -> bool:
+        return self.message_flags & 32768 == 32768
+
+    @property
+    def created_at(self) -> datetime.datetime:
+        if self._created_at is None:
+            self._created_at = datetime.datetime.fromisoformat(self.timestamp)
+        return self._created_at
+
+    @property
+    def embeds(self) -> List[Dict[str, Any]]:
+        if self._embeds is _UNSET:
+            self._embeds = decode_payload(self.embed_data, self.payload_codec) or []
+        return self._embeds
+
+    @property
+    def attachments(self) -> List[Dict[str, Any]]:
+        if self._attachments is _UNSET:
+            self._attachments = decode_payload(self.attachments_data, self.payload_codec) or []
+        return self._attachments
+
+    @property
+    def components(self) -> List[Dict[str, Any]]:
+        if self._components is _UNSET:
+            self._components = decode_payload(self.components_data, self.payload_codec) or []
+        return self._components
+
+    @property
+    def link_data(self) -> List[int]:
+        return [self.guild_id, self.channel_id, self.message_id]
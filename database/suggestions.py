@@ -0,0 +1,138 @@
+import bisect
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LABEL_LENGTH = 100
+
+
+def _build_entry(bookmark_id: int, author_name: Optional[str], preview: Optional[str]) -> Tuple[str, str]:
+    text = author_name or "Nieznany"
+    preview = " ".join((preview or "").split())
+    if preview:
+        text += f": {preview}"
+    label = f"#{bookmark_id} · {text}"
+    if len(label) > LABEL_LENGTH:
+        label = label[:LABEL_LENGTH - 3] + "..."
+    return label, text.casefold()
+
+
+class _UserSuggestions:
+    __slots__ = ("keys", "entries")
+
+    def __init__(self):
+        # Klucze to ID jako tekst, posortowane leksykograficznie, więc prefiks ID to ciągły przedział.
+        self.keys: List[str] = []
+        self.entries: Dict[int, Tuple[str, str]] = {}
+
+    def add(self, bookmark_id: int, author_name: Optional[str], preview: Optional[str]) -> None:
+        if bookmark_id not in self.entries:
+            bisect.insort(self.keys, str(bookmark_id))
+        self.entries[bookmark_id] = _build_entry(bookmark_id, author_name, preview)
+
+    def discard(self, bookmark_id: int) -> bool:
+        if self.entries.pop(bookmark_id, None) is None:
+            return False
+        key = str(bookmark_id)
+        index = bisect.bisect_left(self.keys, key)
+        del self.keys[index]
+        return True
+
+    def by_prefix(self, prefix: str) -> List[int]:
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\x7f", start)
+        return sorted((int(key) for key in self.keys[start:end]), reverse=True)
+
+
+class SuggestionIndex:
+    def __init__(self, max_entries: int = 200_000, max_user_entries: int = 5000):
+        self.max_entries = max_entries
+        self.max_user_entries = max_user_entries
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._users: "OrderedDict[int, _UserSuggestions]" = OrderedDict()
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    def load(self, user_id: int, rows: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> None:
+        self.drop(user_id)
+        suggestions = _UserSuggestions()
+        for bookmark_id, author_name, preview in rows:
+            suggestions.add(bookmark_id, author_name, preview)
+        self._users[user_id] = suggestions
+        self.size += len(suggestions.entries)
+        self._evict(keep=user_id)
+
+    def add(self, user_id: int, bookmark_id: int, author_name: Optional[str], preview: Optional[str]) -> None:
+        suggestions = self._users.get(user_id)
+        if suggestions is None:
+            return
+        before = len(suggestions.entries)
+        suggestions.add(bookmark_id, author_name, preview)
+        self.size += len(suggestions.entries) - before
+        if len(suggestions.entries) > self.max_user_entries:
+            suggestions.discard(min(suggestions.entries))
+            self.size -= 1
+        self._evict(keep=user_id)
+
+    def discard(self, user_id: int, bookmark_ids: Iterable[int]) -> None:
+        suggestions = self._users.get(user_id)
+        if suggestions is None:
+            return
+        for bookmark_id in bookmark_ids:
+            if suggestions.discard(bookmark_id):
+                self.size -= 1
+
+    def drop(self, user_id: int) -> None:
+        suggestions = self._users.pop(user_id, None)
+        if suggestions is not None:
+            self.size -= len(suggestions.entries)
+
+    def clear(self) -> None:
+        self._users.clear()
+        self.size = 0
+
+    def search(self, user_id: int, query: str, limit: int = 25) -> Optional[List[Tuple[int, str]]]:
+        suggestions = self._users.get(user_id)
+        if suggestions is None:
+            self.misses += 1
+            return None
+        self._users.move_to_end(user_id)
+        self.hits += 1
+
+        query = query.strip().lstrip("#")
+        entries = suggestions.entries
+        if not query:
+            ids = sorted(entries, reverse=True)[:limit]
+            return [(bookmark_id, entries[bookmark_id][0]) for bookmark_id in ids]
+
+        ids = suggestions.by_prefix(query)[:limit] if query.isdigit() else []
+        if len(ids) < limit:
+            needle = query.casefold()
+            seen = set(ids)
+            for bookmark_id in sorted(entries, reverse=True):
+                if bookmark_id not in seen and needle in entries[bookmark_id][1]:
+                    ids.append(bookmark_id)
+                    if len(ids) == limit:
+                        break
+        return [(bookmark_id, entries[bookmark_id][0]) for bookmark_id in ids]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._users),
+            "size": self.size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _evict(self, keep: Optional[int] = None) -> None:
+        while self.size > self.max_entries and self._users:
+            user_id = next(iter(self._users))
+            if user_id == keep:
+                break
+            self.drop(user_id)
+            self.evictions += 1
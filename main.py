@@ -1,32 +1,103 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
 import discord
 from discord.ext import commands
-import asyncio
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 load_dotenv()
 
 TOKEN = os.getenv('token')
 
-intents = discord.Intents.all()
+TREE_HASH_PATH = os.getenv('tree_hash_path', '.command_tree.hash')
+
+EXTENSIONS = ('cogs.bookmarks',)
+
+SHARD_COUNT = int(os.getenv('shard_count')) if os.getenv('shard_count') else None
+SHARD_IDS = [int(shard_id) for shard_id in os.getenv('shard_ids').split(',')] if os.getenv('shard_ids') else None
+
+intents = discord.Intents.none()
+intents.guilds = True
+# Zdarzenia edycji i usunięcia wiadomości utrzymują zapisane zakładki w zgodzie z oryginałem.
+intents.guild_messages = True
+intents.message_content = os.getenv('message_content_intent', '0') == '1'
+
+
+class BookmarksBot(commands.AutoShardedBot):
+    async def setup_hook(self):
+        failed = False
+        for extension in EXTENSIONS:
+            try:
+                await self.load_extension(extension)
+                print(f"Załadowano rozszerzenie: {extension}")
+            except Exception as e:
+                failed = True
+                print(f"Błąd podczas ładowania rozszerzenia {extension}: {e}")
+
+        # Niepełne drzewo nadpisałoby globalne komendy, więc po błędzie ładowania synchronizacja jest pomijana.
+        if failed:
+            print("Pomijam synchronizację komend z powodu błędów ładowania rozszerzeń")
+            return
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+        # W trybie klastra komendy synchronizuje tylko proces obsługujący shard 0.
+        if SHARD_IDS is None or 0 in SHARD_IDS:
+            await self.sync_commands_if_changed()
+
+    def command_tree_hash(self) -> str:
+        commands_payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands()),
+            key=lambda payload: (payload.get("type", 1), payload["name"])
+        )
+        payload = json.dumps([self.application_id, commands_payload], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def sync_commands_if_changed(self) -> None:
+        tree_hash = self.command_tree_hash()
+        try:
+            with open(TREE_HASH_PATH) as f:
+                if f.read().strip() == tree_hash:
+                    print("Komendy bez zmian, pomijam synchronizację")
+                    return
+        except FileNotFoundError:
+            pass
+
+        try:
+            synced = await self.tree.sync()
+        except Exception as e:
+            print(f"Błąd podczas synchronizacji komend: {e}")
+            return
+
+        with open(TREE_HASH_PATH, "w") as f:
+            f.write(tree_hash)
+        print(f"Zsynchronizowano {len(synced)} komend")
+
+
+bot = BookmarksBot(
+    command_prefix='!',
+    intents=intents,
+    member_cache_flags=discord.MemberCacheFlags.none(),
+    chunk_guilds_at_startup=False,
+    max_messages=None,
+    shard_count=SHARD_COUNT,
+    shard_ids=SHARD_IDS
+)
 
 @bot.event
 async def on_ready():
-    print(f'Zalogowano jako {bot.user.name}')
-    
-    try:
-        await bot.load_extension('cogs.bookmarks')
-        print("Załadowano cog: bookmarks")
-    except Exception as e:
-        print(f"Błąd podczas ładowania cog bookmarks: {e}")
-    
-    try:
-        synced = await bot.tree.sync()
-        print(f"Zsynchronizowano {len(synced)} komend")
-    except Exception as e:
-        print(f"Błąd podczas synchronizacji komend: {e}")
+    startup = f"{time.perf_counter() - STARTED_AT:.2f} s od startu"
+    if resource is not None:
+        # ru_maxrss jest w KiB na Linuksie.
+        startup += f", RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB"
+    print(f'Zalogowano jako {bot.user.name} ({startup})')
 
 if __name__ == "__main__":
     bot.run(TOKEN)
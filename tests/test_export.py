@@ -0,0 +1,69 @@
+import asyncio
+import gzip
+import tempfile
+import tracemalloc
+
+from benchmarks.fakes import FakeBot, FakeInteraction, FakeUser, MessageFactory
+from cogs.bookmarks import BookmarksCog
+from database.codec import CODEC_ZLIB
+from database.export import read_import
+from database.manager import DatabaseManager
+
+
+def test_export_streams_without_materialising_bookmarks(tmp_path):
+    records = list(MessageFactory(seed=6).records(2000))
+    for record in records:
+        record["content"] = "treść zakładki " * 250
+
+    async def scenario():
+        db = DatabaseManager(str(tmp_path / "bookmarks.db"))
+        try:
+            await db.import_bookmarks(1, iter(records))
+            with tempfile.TemporaryFile() as fp:
+                tracemalloc.start()
+                try:
+                    exported = await db.export_bookmarks(1, fp, batch_size=50)
+                    peak = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+                fp.seek(0)
+                data = fp.read()
+            return exported, peak, data
+        finally:
+            await db.close()
+
+    exported, peak, data = asyncio.run(scenario())
+
+    raw_size = len(gzip.decompress(data))
+    assert exported == 2000
+    assert sum(1 for _ in read_import(data, raw_size, exported)) == exported
+    assert peak < raw_size / 5
+
+
+def test_export_command_reports_unreadable_bookmarks(tmp_path):
+    async def scenario():
+        db = DatabaseManager(str(tmp_path / "bookmarks.db"))
+        bot = FakeBot()
+        cog = BookmarksCog(bot, db)
+        try:
+            message = MessageFactory(seed=7).message()
+            await db.save_bookmark(1, message, '[{"title": "embed"}]', None, guild_id=message.guild.id)
+            await db._run_write(lambda conn: conn.execute(
+                "UPDATE message_snapshots SET embed_data = ?, payload_codec = ?", (b"uszkodzone", CODEC_ZLIB)
+            ) and conn.commit())
+
+            interaction = FakeInteraction(bot, FakeUser(1, "Użytkownik"), None)
+            sent = []
+
+            async def send(*args, **kwargs):
+                sent.append(kwargs.get("embed") or args[0])
+            interaction.followup.send = send
+            await cog.export_bookmarks_command.callback(cog, interaction)
+            return interaction, sent
+        finally:
+            await db.close()
+
+    interaction, sent = asyncio.run(scenario())
+
+    assert interaction.response.calls == ["defer"]
+    assert len(sent) == 1 and sent[0].title == "❌ Błąd"
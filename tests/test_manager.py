@@ -0,0 +1,167 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from benchmarks.fakes import MessageFactory
+from database.manager import MAX_LIST_FILTERS, DatabaseManager
+from database.models import BookmarkFilter
+from ui.components import BookmarksView
+
+
+def run(db_path, scenario):
+    async def main():
+        db = DatabaseManager(str(db_path))
+        try:
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+
+def test_concurrent_saves_of_one_message_create_one_bookmark(tmp_path):
+    message = MessageFactory(seed=1).message()
+
+    async def scenario(db):
+        return await asyncio.gather(*(
+            db.save_bookmark(42, message, None, None, guild_id=message.guild.id) for _ in range(32)
+        ))
+
+    ids = run(tmp_path / "bookmarks.db", scenario)
+
+    assert len(set(ids)) == 1
+    with sqlite3.connect(tmp_path / "bookmarks.db") as conn:
+        rows = conn.execute("SELECT id FROM bookmarks WHERE user_id = 42 AND message_id = ?", (message.id,)).fetchall()
+        total = conn.execute("SELECT total FROM user_bookmark_counts WHERE user_id = 42").fetchone()[0]
+    assert rows == [(ids[0],)]
+    assert total == 1
+
+
+def test_reads_complete_while_write_is_in_flight(tmp_path):
+    factory = MessageFactory(seed=2)
+    release = threading.Event()
+
+    def slow_write(conn):
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE user_bookmark_counts SET total = total WHERE user_id = 42")
+            release.wait(5)
+
+    async def scenario(db):
+        for _ in range(20):
+            message = factory.message()
+            await db.save_bookmark(42, message, None, None, guild_id=message.guild.id)
+
+        write = asyncio.ensure_future(db._run_write(slow_write))
+        await asyncio.sleep(0.05)
+        try:
+            started = time.perf_counter()
+            summaries, total = await asyncio.wait_for(db.get_bookmark_summaries(42), timeout=1)
+            elapsed = time.perf_counter() - started
+            assert not write.done()
+        finally:
+            release.set()
+            await write
+        return summaries, total, elapsed
+
+    summaries, total, elapsed = run(tmp_path / "bookmarks.db", scenario)
+
+    assert total == 20
+    assert len(summaries) == 10
+    assert elapsed < 0.5
+
+
+def test_search_is_scoped_to_the_user_and_follows_edits(tmp_path):
+    factory = MessageFactory(seed=3)
+    shared = factory.message()
+    shared.content = "ogłoszenie serwera"
+
+    async def scenario(db):
+        own_id = await db.save_bookmark(1, shared, None, None, guild_id=shared.guild.id)
+        await db.save_bookmark(2, shared, None, None, guild_id=shared.guild.id)
+        # Ciężki użytkownik z tymi samymi słowami nie może zmieniać wyników ani liczników innych osób.
+        for _ in range(300):
+            message = factory.message()
+            message.content = "serwer ogłoszenie " + message.content
+            await db.save_bookmark(2, message, None, None, guild_id=message.guild.id)
+
+        before = await db.search_bookmarks(1, "OGŁOSZENIE serw")
+        await db.apply_source_changes({shared.id: {"content": "nowa treść"}}, ())
+        after_old = await db.search_bookmarks(1, "ogłoszenie")
+        after_new = await db.search_bookmarks(1, "tresc")
+        heavy = await db.search_bookmarks(2, "ogłoszenie")
+        await db.delete_bookmark(own_id, 1)
+        deleted = await db.search_bookmarks(1, "treść")
+        return own_id, before, after_old, after_new, heavy, deleted
+
+    own_id, before, after_old, after_new, heavy, deleted = run(tmp_path / "bookmarks.db", scenario)
+
+    assert [summary.id for summary in before[0]] == [own_id] and before[1] == 1
+    assert after_old == ([], 0)
+    assert [summary.id for summary in after_new[0]] == [own_id]
+    assert heavy[1] == 300
+    assert deleted == ([], 0)
+
+
+def test_stale_render_is_stored_on_the_snapshot_it_was_built_from(tmp_path):
+    message = MessageFactory(seed=4).message()
+    message.content = "stara treść"
+    path = str(tmp_path / "bookmarks.db")
+
+    async def scenario():
+        first, second = DatabaseManager(path), DatabaseManager(path)
+        bookmark_id = await first.save_bookmark(1, message, None, None, guild_id=message.guild.id)
+        stale = await second.get_bookmark_by_id(bookmark_id, 1)
+        await first.apply_source_changes({message.id: {"content": "NOWA TREŚĆ"}}, ())
+        BookmarksView(second).create_bookmark_detail_embed(stale)
+        await first.close()
+        await second.close()
+
+        fresh = DatabaseManager(path)
+        try:
+            bookmark = await fresh.get_bookmark_by_id(bookmark_id, 1)
+            embed, _, _ = BookmarksView(fresh).create_bookmark_detail_embed(bookmark)
+        finally:
+            await fresh.close()
+        return bookmark, embed
+
+    bookmark, embed = asyncio.run(scenario())
+
+    assert bookmark.content == "NOWA TREŚĆ"
+    assert embed.description == "NOWA TREŚĆ"
+
+
+def test_filters_follow_a_resaved_snapshot(tmp_path):
+    message = MessageFactory(seed=5).message()
+
+    async def scenario(db):
+        await db.save_bookmark(1, message, None, None, guild_id=message.guild.id)
+        message.author.display_name = "Renamed"
+        bookmark_id = await db.save_bookmark(1, message, None, None, guild_id=message.guild.id)
+        filtered = await db.get_bookmark_summaries(1, filters=BookmarkFilter(author_name="Renamed"))
+        deleted = await db.delete_bookmarks_by_filter(1, author_name="Renamed")
+        return bookmark_id, filtered, deleted
+
+    bookmark_id, filtered, deleted = run(tmp_path / "bookmarks.db", scenario)
+
+    assert [summary.id for summary in filtered[0]] == [bookmark_id] and filtered[1] == 1
+    assert deleted == 1
+
+
+def test_list_filters_keep_only_the_most_recent(tmp_path):
+    async def scenario(db):
+        first = await db.save_list_filter(1, BookmarkFilter(guild_id=1))
+        for guild_id in range(2, MAX_LIST_FILTERS + 5):
+            await db.save_list_filter(1, BookmarkFilter(guild_id=guild_id))
+            if guild_id == MAX_LIST_FILTERS:
+                assert await db.save_list_filter(1, BookmarkFilter(guild_id=1)) == first
+        await db.save_list_filter(2, BookmarkFilter(guild_id=1))
+        return first, await db.get_list_filter(first, 1), await db.get_list_filter(first + 1, 1)
+
+    first, reused, expired = run(tmp_path / "bookmarks.db", scenario)
+
+    with sqlite3.connect(tmp_path / "bookmarks.db") as conn:
+        counts = dict(conn.execute("SELECT user_id, COUNT(*) FROM list_filters GROUP BY user_id"))
+    assert counts == {1: MAX_LIST_FILTERS, 2: 1}
+    assert reused == BookmarkFilter(guild_id=1)
+    assert expired is None
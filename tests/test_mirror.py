@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from database.blobs import BlobStore
+from database.manager import DatabaseManager, attachment_url_key
+from utils.mirror import AttachmentMirror
+
+IMAGE = bytes(range(256)) * 1024
+
+
+def attachment(server, path, size=0):
+    return SimpleNamespace(url=str(server.make_url(path)) + "?ex=0", filename=path.rsplit("/", 1)[-1],
+                           content_type="image/png", size=size)
+
+
+def run(tmp_path, scenario):
+    async def handler(request):
+        name = request.match_info["name"]
+        if name == "image.png":
+            return web.Response(body=IMAGE, content_type="image/png")
+        if name == "broken.png":
+            return web.Response(status=500)
+        raise web.HTTPNotFound()
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/attachments/{name}", handler)
+        server = TestServer(app)
+        await server.start_server()
+        db = DatabaseManager(str(tmp_path / "bookmarks.db"))
+        store = BlobStore(str(tmp_path / "blobs"))
+        mirror = AttachmentMirror(db, store, workers=2, max_file_bytes=len(IMAGE))
+        await mirror.start()
+        try:
+            return await scenario(server, db, store, mirror)
+        finally:
+            await mirror.close()
+            await db.close()
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_mirror_stores_downloaded_attachment(tmp_path):
+    async def scenario(server, db, store, mirror):
+        image = attachment(server, "/attachments/image.png", len(IMAGE))
+        mirror.submit([image])
+        await mirror.join()
+        # Drugie zgłoszenie tego samego adresu nie pobiera pliku ponownie.
+        mirror.submit([image])
+        await mirror.join()
+        url_key = attachment_url_key(image.url)
+        return url_key, await db.get_attachment_mirrors([url_key]), mirror.stats()
+
+    url_key, mirrors, stats = run(tmp_path, scenario)
+
+    digest, filename = mirrors[url_key]
+    assert filename == "image.png"
+    with open(BlobStore(str(tmp_path / "blobs")).path(digest), "rb") as f:
+        assert f.read() == IMAGE
+    assert stats["mirrored"] == 1 and stats["skipped"] == 1 and stats["failed"] == 0
+
+
+def test_mirror_counts_failed_downloads(tmp_path, capsys):
+    async def scenario(server, db, store, mirror):
+        attachments = [attachment(server, "/attachments/missing.png"), attachment(server, "/attachments/broken.png")]
+        mirror.submit(attachments)
+        await mirror.join()
+        url_keys = [attachment_url_key(item.url) for item in attachments]
+        return await db.get_attachment_mirrors(url_keys), len(store), mirror.stats()
+
+    mirrors, blobs, stats = run(tmp_path, scenario)
+
+    assert mirrors == {} and blobs == 0
+    assert stats["failed"] == 2 and stats["mirrored"] == 0
+    assert "missing.png" in capsys.readouterr().out
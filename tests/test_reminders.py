@@ -0,0 +1,32 @@
+import asyncio
+
+from benchmarks.fakes import FakeBot, MessageFactory
+from cogs import bookmarks
+from cogs.bookmarks import BookmarksCog
+from database.manager import DatabaseManager
+
+
+def test_reminder_at_the_cap_can_be_postponed(tmp_path, monkeypatch):
+    monkeypatch.setattr(bookmarks, "MAX_USER_REMINDERS", 2)
+    factory = MessageFactory(seed=8)
+
+    async def scenario():
+        db = DatabaseManager(str(tmp_path / "bookmarks.db"))
+        cog = BookmarksCog(FakeBot(), db)
+        try:
+            ids = []
+            for _ in range(3):
+                message = factory.message()
+                ids.append(await db.save_bookmark(1, message, None, None, guild_id=message.guild.id))
+            first = await cog.schedule_reminder(1, ids[0], 60)
+            second = await cog.schedule_reminder(1, ids[1], 60)
+            over_cap = await cog.schedule_reminder(1, ids[2], 60)
+            postponed = await cog.schedule_reminder(1, ids[0], 3600)
+            return [first, second, over_cap, postponed], await db.count_reminders(1)
+        finally:
+            await db.close()
+
+    results, count = asyncio.run(scenario())
+
+    assert [ok for ok, _ in results] == [True, True, False, True]
+    assert count == 2
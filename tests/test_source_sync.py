@@ -0,0 +1,38 @@
+import asyncio
+
+from database.manager import DatabaseManager
+from utils.source_sync import SourceMessageSync
+
+
+def test_unexpected_error_does_not_stop_the_sync_task(tmp_path, capsys):
+    async def main():
+        db = DatabaseManager(str(tmp_path / "bookmarks.db"))
+        applied = []
+
+        async def apply_source_changes(edits, deleted):
+            if not applied:
+                applied.append(None)
+                raise RuntimeError("zepsuta partia")
+            applied.append((edits, set(deleted)))
+            return len(edits), len(deleted)
+
+        db.apply_source_changes = apply_source_changes
+        sync = SourceMessageSync(db, delay=0.01)
+        sync.start()
+        try:
+            sync.message_edited(1, {"content": "a"})
+            await asyncio.sleep(0.1)
+            sync.messages_deleted([2])
+            await asyncio.sleep(0.1)
+            running = not sync._task.done()
+        finally:
+            await sync.close()
+            await db.close()
+        return running, applied, sync.stats()
+
+    running, applied, stats = asyncio.run(main())
+
+    assert running
+    assert applied[1:] == [({}, {2})]
+    assert stats["failed"] == 1 and stats["flushes"] == 1 and stats["marked"] == 1
+    assert "zepsuta partia" in capsys.readouterr().err
@@ -2,76 +2,125 @@ import discord
 import datetime
 import json
 from typing import List, Tuple, Optional, Dict, Any, Union
-from database.manager import DatabaseManager
+from database.codec import CODEC_JSON, decode_payload
+from database.blobs import BlobStore
+from database.manager import DatabaseManager, attachment_url_key
+from database.models import Bookmark, BookmarkFilter, BookmarkSummary
+from utils.metrics import metrics
+from utils.mirror import cdn_url_expired
+
+RENDER_DATA_VERSION = 2
+
+MODAL_TIMEOUT = 300
+
+GIF_DOMAINS = (
+    'tenor.com',
+    'giphy.com',
+    'gfycat.com',
+    'imgur.com',
+    'media.discordapp.net',
+    'cdn.discordapp.com'
+)
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.webm', '.avi', '.mkv')
+
+COMPONENT_TYPE_NAMES = {
+    1: "ActionRow",
+    2: "Button",
+    3: "SelectMenu",
+    4: "TextInput",
+    10: "TextDisplay",
+    11: "MediaGallery",
+    12: "File",
+    13: "Separator",
+    14: "Container",
+    15: "Section",
+    16: "Thumbnail",
+    17: "ComponentsV2Root"
+}
+
+CONTAINER_COMPONENT_TYPES = frozenset((1, 14, 15, 17))
 
 class BookmarksView:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, blob_store: Optional[BlobStore] = None):
         self.db_manager = db_manager
+        self.blob_store = blob_store
 
     def is_gif_url(self, url: str) -> bool:
         if not url:
             return False
 
-        if url.lower().endswith('.gif'):
+        url = url.lower()
+        if url.endswith('.gif'):
             return True
 
-        gif_domains = [
-            'tenor.com',
-            'giphy.com',
-            'gfycat.com',
-            'imgur.com',
-            'media.discordapp.net',
-            'cdn.discordapp.com'
-        ]
-
-        for domain in gif_domains:
-            if domain in url.lower():
+        for domain in GIF_DOMAINS:
+            if domain in url:
                 return True
 
         return False
 
-    async def create_bookmarks_page(self, user_id: int, page: int = 1) -> Tuple[Optional[discord.Embed], Optional[discord.ui.View], List, int, int]:
+    async def create_bookmarks_page(self, user_id: int, page: int = 1, before_id: Optional[int] = None,
+                                    after_id: Optional[int] = None, filters: Optional[BookmarkFilter] = None,
+                                    filter_id: Optional[int] = None) -> Tuple[Optional[discord.Embed], Optional[discord.ui.View], List, int, int]:
         if page < 1:
             page = 1
 
-        bookmarks, total = self.db_manager.get_user_bookmarks(user_id, page)
+        bookmarks, total = await self.db_manager.get_bookmark_summaries(
+            user_id, page, before_id=before_id, after_id=after_id, filters=filters
+        )
         max_pages = (total + 9) // 10
 
         if not bookmarks:
             return None, None, bookmarks, total, max_pages
 
-        embed = discord.Embed(
-            title="📚 Twoje zakładki",
-            description=f"Strona {page}/{max_pages} (łącznie {total} zakładek)",
-            color=0x3498db
-        )
+        with metrics.timed("render"):
+            description = f"Strona {page}/{max_pages} (łącznie {total} zakładek)"
+            if filters is not None and filters.active:
+                description += "\n" + self._describe_filters(filters)
+            embed = discord.Embed(
+                title="📚 Twoje zakładki",
+                description=description,
+                color=0x3498db
+            )
 
+            bookmark_options = self._add_bookmark_list_fields(embed, bookmarks)
+
+            view = BookmarksPageView(user_id, bookmark_options, page, max_pages, bookmarks[0].id, bookmarks[-1].id, filter_id)
+        return embed, view, bookmarks, total, max_pages
+
+    @staticmethod
+    def _describe_filters(filters: BookmarkFilter) -> str:
+        parts = []
+        if filters.tag is not None:
+            parts.append(f"🏷️ {filters.tag}")
+        if filters.guild_id is not None:
+            parts.append("🏠 ten serwer")
+        if filters.author_name is not None:
+            parts.append(f"👤 {filters.author_name}")
+        if filters.saved_after is not None:
+            parts.append(f"od {filters.saved_after[:10]}")
+        if filters.saved_before is not None:
+            saved_until = datetime.date.fromisoformat(filters.saved_before[:10]) - datetime.timedelta(days=1)
+            parts.append(f"do {saved_until.isoformat()}")
+        if filters.has_attachments:
+            parts.append("📎 z załącznikami")
+        return "Filtry: " + ", ".join(parts)
+
+    def _add_bookmark_list_fields(self, embed: discord.Embed, bookmarks: List[BookmarkSummary]) -> List[discord.SelectOption]:
         bookmark_options = []
 
         for bookmark in bookmarks:
-            bookmark_id = bookmark[0]
-            message_content = bookmark[5] or "(brak treści)"
-            author_name = bookmark[7]
-            timestamp = datetime.datetime.fromisoformat(bookmark[9]).strftime("%d.%m.%Y %H:%M")
-            attachments_data = bookmark[11]
+            bookmark_id = bookmark.id
+            message_content = bookmark.preview or "(brak treści)"
+            author_name = bookmark.author_name
+            timestamp = datetime.datetime.fromisoformat(bookmark.timestamp).strftime("%d.%m.%Y %H:%M")
 
             attachment_info = ""
-            if attachments_data:
-                try:
-                    attachments = json.loads(attachments_data)
-                    image_count = sum(1 for att in attachments if att.get('is_image'))
-                    file_count = len(attachments) - image_count
-
-                    if image_count > 0:
-                        attachment_info += f" 🖼️ {image_count}"
-                    if file_count > 0:
-                        attachment_info += f" 📎 {file_count}"
-                except:
-                    pass
-
-            short_content = message_content
-            if len(message_content) > 100:
-                short_content = message_content[:97] + "..."
+            if bookmark.image_count > 0:
+                attachment_info += f" 🖼️ {bookmark.image_count}"
+            if bookmark.file_count > 0:
+                attachment_info += f" 📎 {bookmark.file_count}"
 
             field_name = f"ID: {bookmark_id} | {author_name} | {timestamp}"
             if attachment_info:
@@ -79,15 +128,13 @@ class BookmarksView:
 
             embed.add_field(
                 name=field_name,
-                value=short_content,
+                value=message_content,
                 inline=False
             )
 
             option_label = message_content
             if len(option_label) > 80:
                 option_label = option_label[:77] + "..."
-            elif option_label == "":
-                option_label = "(brak treści)"
 
             bookmark_options.append(
                 discord.SelectOption(
@@ -97,7 +144,28 @@ class BookmarksView:
                 )
             )
 
-        view = BookmarksPageView(self.db_manager, bookmark_options, page, max_pages)
+        return bookmark_options
+
+    async def create_search_page(self, user_id: int, query: str, page: int = 1) -> Tuple[Optional[discord.Embed], Optional[discord.ui.View], List, int, int]:
+        if page < 1:
+            page = 1
+
+        bookmarks, total = await self.db_manager.search_bookmarks(user_id, query, page)
+        max_pages = (total + 9) // 10
+
+        if not bookmarks:
+            return None, None, bookmarks, total, max_pages
+
+        with metrics.timed("render"):
+            embed = discord.Embed(
+                title=f"🔎 Wyniki wyszukiwania: {query[:200]}",
+                description=f"Strona {page}/{max_pages} (łącznie {total} wyników)",
+                color=0x3498db
+            )
+
+            bookmark_options = self._add_bookmark_list_fields(embed, bookmarks)
+
+            view = BookmarkSearchView(user_id, bookmark_options, query, page, max_pages)
         return embed, view, bookmarks, total, max_pages
 
     def _extract_components_v2_content(self, components: List[discord.Component]) -> Tuple[str, List[str], Dict[str, Any]]:
@@ -180,35 +248,83 @@ class BookmarksView:
 
         return '\n'.join(content_parts), image_urls, metadata
 
-    def create_bookmark_detail_embed(self, bookmark: Tuple) -> Tuple[discord.Embed, List[discord.Embed], List[str]]:
-        bookmark_id = bookmark[0]
-        message_id = bookmark[2]
-        channel_id = bookmark[3]
-        guild_id = bookmark[4]
-        message_content = bookmark[5]
-        embed_data = bookmark[6]
-        author_name = bookmark[7]
-        author_avatar = bookmark[8]
-        timestamp = datetime.datetime.fromisoformat(bookmark[9]).strftime("%d.%m.%Y %H:%M")
-        attachments_data = bookmark[11]
-        components_data = bookmark[12] if len(bookmark) > 12 else None
-        message_flags = bookmark[13] if len(bookmark) > 13 else 0
-
-        is_components_v2 = message_flags & 32768 == 32768
-
-        final_content = message_content
-        additional_embeds = []
+    async def send_bookmark_detail(self, interaction: discord.Interaction, bookmark_id: int) -> None:
+        bookmark = await self.db_manager.get_bookmark_by_id(bookmark_id, interaction.user.id)
+
+        if not bookmark:
+            await interaction.response.send_message(
+                "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu.",
+                ephemeral=True
+            )
+            return
+
+        with metrics.timed("render"):
+            embed, additional_embeds, link_data = self.create_bookmark_detail_embed(bookmark)
+            all_embeds = [embed] + additional_embeds
+
+            view = BookmarkDetailView(interaction.user.id, bookmark_id, link_data)
+
+        files = await self._attach_mirrored_images(all_embeds)
+        await interaction.response.send_message(
+            embeds=all_embeds,
+            view=view,
+            ephemeral=True,
+            **({"files": files} if files else {})
+        )
+
+    async def _attach_mirrored_images(self, embeds: List[discord.Embed]) -> List[discord.File]:
+        if self.blob_store is None:
+            return []
+
+        expired: Dict[str, List[discord.Embed]] = {}
+        for embed in embeds:
+            url = embed.image.url
+            if url and cdn_url_expired(url):
+                expired.setdefault(attachment_url_key(url), []).append(embed)
+        if not expired:
+            return []
+
+        files = []
+        mirrors = await self.db_manager.get_attachment_mirrors(expired)
+        for index, (url_key, (blob_hash, filename)) in enumerate(mirrors.items()):
+            path = self.blob_store.get(blob_hash)
+            if path is None:
+                continue
+            name = f"{index}_{filename}"
+            files.append(discord.File(path, filename=name))
+            for embed in expired[url_key]:
+                embed.set_image(url=f"attachment://{name}")
+        return files
+
+    def get_render_data(self, bookmark: Bookmark) -> Dict[str, Any]:
+        if bookmark.render_cache is not None:
+            return bookmark.render_cache
+
+        if bookmark.render_data:
+            try:
+                render_data = json.loads(bookmark.render_data)
+                if render_data.get('version') == RENDER_DATA_VERSION:
+                    bookmark.render_cache = render_data
+                    return render_data
+            except ValueError:
+                pass
+
+        render_data = self._compute_render_data(bookmark)
+        bookmark.render_cache = render_data
+        self.db_manager.queue_render_data(bookmark, json.dumps(render_data))
+        return render_data
+
+    def _compute_render_data(self, bookmark: Bookmark) -> Dict[str, Any]:
+        components_data = bookmark.components_data
+        is_components_v2 = bookmark.is_components_v2
+
+        final_content = bookmark.content
         image_urls = []
         components_metadata = {}
 
         if is_components_v2 and components_data:
             try:
-                if isinstance(components_data, str):
-                    raw_components = json.loads(components_data)
-                else:
-                    raw_components = components_data
-
-                components_content, components_images, components_metadata = self._process_raw_components_v2(raw_components)
+                components_content, components_images, components_metadata = self._process_raw_components_v2(bookmark.components)
 
                 if components_content:
                     if final_content:
@@ -219,7 +335,7 @@ class BookmarksView:
                 image_urls.extend(components_images)
             except Exception as e:
                 print(f"Błąd przetwarzania Components v2: {e}")
-                components_content, components_images = self._extract_components_v2_content_legacy(components_data)
+                components_content, components_images = self._extract_components_v2_content_legacy(components_data, bookmark.payload_codec)
                 if components_content:
                     if final_content:
                         final_content += "\n\n" + components_content
@@ -227,11 +343,94 @@ class BookmarksView:
                         final_content = components_content
                 image_urls.extend(components_images)
 
+        attachment_counts = None
+        video_urls = []
+        if bookmark.attachments_data:
+            try:
+                attachments = bookmark.attachments
+                attachment_image_urls = [att["url"] for att in attachments if att.get("is_image")]
+                for att in attachments:
+                    filename = att.get("filename", "").lower()
+                    if filename.endswith(VIDEO_EXTENSIONS):
+                        video_urls.append(att["url"])
+
+                image_urls.extend(attachment_image_urls)
+
+                if attachments:
+                    attachment_counts = {
+                        "image": len(attachment_image_urls),
+                        "video": len(video_urls),
+                        "other": len(attachments) - len(attachment_image_urls) - len(video_urls)
+                    }
+            except Exception as e:
+                print(f"Błąd przetwarzania załączników: {e}")
+
+        original_embeds = []
+        if bookmark.embed_data:
+            try:
+                original_embeds = bookmark.embeds
+            except Exception as e:
+                print(f"Błąd przetwarzania embedów: {e}")
+
+        hero_image = None
+        hero_is_gif = False
+        for url in image_urls:
+            if self.is_gif_url(url):
+                hero_image = url
+                hero_is_gif = True
+                break
+
+        if hero_image:
+            image_urls = [url for url in image_urls if url != hero_image]
+        elif image_urls:
+            hero_image = image_urls[0]
+            image_urls = image_urls[1:]
+        else:
+            for embed_dict in original_embeds:
+                if 'image' in embed_dict and embed_dict['image'].get('url'):
+                    url = embed_dict['image']['url']
+                    if self.is_gif_url(url):
+                        hero_image = url
+                        hero_is_gif = True
+                        break
+
+                if 'thumbnail' in embed_dict and embed_dict['thumbnail'].get('url'):
+                    url = embed_dict['thumbnail']['url']
+                    if self.is_gif_url(url):
+                        hero_image = url
+                        hero_is_gif = True
+                        break
+
+        return {
+            'version': RENDER_DATA_VERSION,
+            'content': final_content,
+            'is_components_v2': is_components_v2,
+            'components_metadata': {
+                key: value for key, value in components_metadata.items() if key != 'component_types'
+            },
+            'attachment_counts': attachment_counts,
+            'video_urls': video_urls,
+            'hero_image': hero_image,
+            'hero_is_gif': hero_is_gif,
+            'image_urls': image_urls
+        }
+
+    def create_bookmark_detail_embed(self, bookmark: Bookmark) -> Tuple[discord.Embed, List[discord.Embed], List[int]]:
+        bookmark_id = bookmark.id
+        message_id = bookmark.message_id
+        channel_id = bookmark.channel_id
+        guild_id = bookmark.guild_id
+        author_name = bookmark.author_name
+        author_avatar = bookmark.author_avatar
+
+        render_data = self.get_render_data(bookmark)
+        additional_embeds = []
+
         embed = discord.Embed(
             title=f"📖 Zakładka #{bookmark_id}",
-            description=final_content or "*Brak treści*",
+            description=render_data['content'] or "*Brak treści*",
             color=0x3498db,
-            timestamp=datetime.datetime.fromisoformat(bookmark[9])
+            timestamp=bookmark.created_at
         )
 
         if author_avatar:
@@ -242,9 +441,21 @@ class BookmarksView:
         embed.add_field(name="Oryginalny kanał", value=f"<#{channel_id}>", inline=True)
         embed.add_field(name="Link do wiadomości", value=f"[Kliknij tutaj](https://discord.com/channels/{guild_id}/{channel_id}/{message_id})", inline=True)
 
-        if is_components_v2:
+        if bookmark.tags:
+            embed.add_field(name="🏷️ Tagi", value=", ".join(bookmark.tags), inline=False)
+
+        if bookmark.source_deleted_at:
+            deleted_at = int(datetime.datetime.fromisoformat(bookmark.source_deleted_at).timestamp())
+            embed.add_field(
+                name="⚠️ Oryginał usunięty",
+                value=f"Wiadomość źródłowa została usunięta <t:{deleted_at}:R>. Zakładka zawiera ostatnią zapisaną wersję.",
+                inline=False
+            )
+
+        if render_data['is_components_v2']:
             embed.add_field(name="Typ wiadomości", value="🔧 Interaktywna (Components v2)", inline=True)
 
+            components_metadata = render_data['components_metadata']
             if components_metadata:
                 comp_info = []
                 if components_metadata.get('has_buttons'):
@@ -276,110 +487,57 @@ class BookmarksView:
                         inline=False
                     )
 
-        if attachments_data:
-            try:
-                attachments = json.loads(attachments_data)
-                attachment_image_urls = [att["url"] for att in attachments if att.get("is_image")]
-                video_urls = []
-                for att in attachments:
-                    filename = att.get("filename", "").lower()
-                    if any(filename.endswith(ext) for ext in ['.mp4', '.mov', '.webm', '.avi', '.mkv']):
-                        video_urls.append(att["url"])
-
-                image_urls.extend(attachment_image_urls)
+        file_types = render_data['attachment_counts']
+        if file_types:
+            attachments_info = []
+            if file_types["image"] > 0:
+                attachments_info.append(f"🖼️ {file_types['image']}")
+            if file_types["video"] > 0:
+                attachments_info.append(f"🎬 {file_types['video']}")
+            if file_types["other"] > 0:
+                attachments_info.append(f"📎 {file_types['other']}")
 
-                if attachments:
-                    file_types = {
-                        "image": len(attachment_image_urls),
-                        "video": len(video_urls),
-                        "other": len(attachments) - len(attachment_image_urls) - len(video_urls)
-                    }
-
-                    attachments_info = []
-                    if file_types["image"] > 0:
-                        attachments_info.append(f"🖼️ {file_types['image']}")
-                    if file_types["video"] > 0:
-                        attachments_info.append(f"🎬 {file_types['video']}")
-                    if file_types["other"] > 0:
-                        attachments_info.append(f"📎 {file_types['other']}")
-
-                    embed.add_field(
-                        name="Załączniki",
-                        value=" ".join(attachments_info),
-                        inline=False
-                    )
-
-                if video_urls:
-                    video_links = "\n".join([f"[Wideo {i+1}]({url})" for i, url in enumerate(video_urls)])
-                    embed.add_field(
-                        name="🎬 Wideo",
-                        value=video_links,
-                        inline=False
-                    )
-
-            except Exception as e:
-                print(f"Błąd przetwarzania załączników: {e}")
-
-        gif_url = None
-        for url in image_urls:
-            if self.is_gif_url(url):
-                gif_url = url
-                break
+            embed.add_field(
+                name="Załączniki",
+                value=" ".join(attachments_info),
+                inline=False
+            )
 
-        if gif_url:
-            embed.set_image(url=gif_url)
-            image_urls = [url for url in image_urls if url != gif_url]
+        if render_data['video_urls']:
+            video_links = "\n".join([f"[Wideo {i+1}]({url})" for i, url in enumerate(render_data['video_urls'])])
             embed.add_field(
-                name="🎬 GIF",
-                value="Wyświetlono w powiększonym rozmiarze",
+                name="🎬 Wideo",
+                value=video_links,
                 inline=False
             )
-        elif image_urls:
-            embed.set_image(url=image_urls[0])
-            image_urls = image_urls[1:]
-        else:
-            if embed_data:
-                try:
-                    original_embeds = json.loads(embed_data)
-                    for embed_dict in original_embeds:
-                        if 'image' in embed_dict and embed_dict['image'].get('url'):
-                            url = embed_dict['image']['url']
-                            if self.is_gif_url(url):
-                                embed.set_image(url=url)
-                                embed.add_field(
-                                    name="🎬 GIF",
-                                    value="Wyświetlono w powiększonym rozmiarze",
-                                    inline=False
-                                )
-                                break
-
-                        if 'thumbnail' in embed_dict and embed_dict['thumbnail'].get('url'):
-                            url = embed_dict['thumbnail']['url']
-                            if self.is_gif_url(url):
-                                embed.set_image(url=url)
-                                embed.add_field(
-                                    name="🎬 GIF",
-                                    value="Wyświetlono w powiększonym rozmiarze",
-                                    inline=False
-                                )
-                                break
-                except Exception as e:
-                    print(f"Błąd przetwarzania embedów pod kątem GIF-ów: {e}")
 
-        for url in image_urls:
+        if render_data['hero_image']:
+            embed.set_image(url=render_data['hero_image'])
+            if render_data['hero_is_gif']:
+                embed.add_field(
+                    name="🎬 GIF",
+                    value="Wyświetlono w powiększonym rozmiarze",
+                    inline=False
+                )
+
+        for url in render_data['image_urls']:
             image_embed = discord.Embed(color=0x3498db)
             image_embed.set_image(url=url)
             additional_embeds.append(image_embed)
 
-        if embed_data:
+        try:
+            original_embeds = bookmark.embeds
+        except Exception as e:
+            print(f"Błąd przetwarzania embedów: {e}")
+            original_embeds = []
+
+        for embed_dict in original_embeds:
             try:
-                original_embeds = json.loads(embed_data)
-                for embed_dict in original_embeds:
-                    additional_embeds.append(discord.Embed.from_dict(embed_dict))
+                additional_embeds.append(discord.Embed.from_dict(embed_dict))
             except Exception as e:
                 print(f"Błąd przetwarzania embedów: {e}")
 
-        return embed, additional_embeds, [guild_id, channel_id, message_id]
+        return embed, additional_embeds, bookmark.link_data
 
     def _process_raw_components_v2(self, raw_components: List[Dict]) -> Tuple[str, List[str], Dict[str, Any]]:
         content_parts = []
@@ -394,81 +552,67 @@ class BookmarksView:
             'layout_structure': []
         }
 
-        def process_raw_component(component: Dict, depth: int = 0) -> None:
+        layout = metadata['layout_structure']
+        component_types = metadata['component_types']
+        stack = [(component, 0) for component in reversed(raw_components)]
+
+        while stack:
+            component, depth = stack.pop()
             indent = "  " * depth
             comp_type = component.get('type', 0)
 
-            type_names = {
-                1: "ActionRow",
-                2: "Button",
-                3: "SelectMenu",
-                4: "TextInput",
-                10: "TextDisplay",
-                11: "MediaGallery",
-                12: "File",
-                13: "Separator",
-                14: "Container",
-                15: "Section",
-                16: "Thumbnail",
-                17: "ComponentsV2Root"
-            }
-
-            type_name = type_names.get(comp_type, f"Unknown({comp_type})")
-            metadata['component_types'].append(type_name)
+            type_name = COMPONENT_TYPE_NAMES.get(comp_type) or f"Unknown({comp_type})"
+            component_types.append(type_name)
 
             if comp_type == 2:
                 metadata['has_buttons'] = True
                 label = component.get('label', 'No label')
-                metadata['layout_structure'].append(f"{indent}🔘 Button: {label}")
+                layout.append(f"{indent}🔘 Button: {label}")
                 if component.get('url'):
-                    metadata['layout_structure'].append(f"{indent}  🔗 URL: {component['url']}")
+                    layout.append(f"{indent}  🔗 URL: {component['url']}")
 
             elif comp_type == 3:
                 metadata['has_select_menus'] = True
                 placeholder = component.get('placeholder', 'No placeholder')
-                metadata['layout_structure'].append(f"{indent}📋 Select Menu: {placeholder}")
+                layout.append(f"{indent}📋 Select Menu: {placeholder}")
 
             elif comp_type == 10:
                 metadata['has_text_displays'] = True
                 text_content = component.get('content', '') or component.get('text', '')
                 if text_content:
                     content_parts.append(text_content)
-                    metadata['layout_structure'].append(f"{indent}📝 Text Display: {text_content[:50]}{'...' if len(text_content) > 50 else ''}")
+                    layout.append(f"{indent}📝 Text Display: {text_content[:50]}{'...' if len(text_content) > 50 else ''}")
 
             elif comp_type == 11:
                 metadata['has_media_galleries'] = True
-                metadata['layout_structure'].append(f"{indent}🖼️ Media Gallery")
+                layout.append(f"{indent}🖼️ Media Gallery")
                 for item in component.get('items', []):
                     media = item.get('media', {})
                     if media.get('url'):
                         image_urls.append(media['url'])
-                        metadata['layout_structure'].append(f"{indent}  📎 Media: {media['url']}")
+                        layout.append(f"{indent}  📎 Media: {media['url']}")
 
             elif comp_type == 12:
                 metadata['has_files'] = True
-                metadata['layout_structure'].append(f"{indent}📁 File Component")
+                layout.append(f"{indent}📁 File Component")
 
-            elif comp_type in [1, 14, 15, 17]:
-                container_name = type_name
-                metadata['layout_structure'].append(f"{indent}📦 {container_name}")
-                for child in component.get('components', []):
-                    process_raw_component(child, depth + 1)
+            elif comp_type in CONTAINER_COMPONENT_TYPES:
+                layout.append(f"{indent}📦 {type_name}")
+                children = component.get('components', [])
+                stack.extend((child, depth + 1) for child in reversed(children))
 
             else:
-                metadata['layout_structure'].append(f"{indent}❓ {type_name}")
-
-        for component in raw_components:
-            process_raw_component(component)
+                layout.append(f"{indent}❓ {type_name}")
 
         return '\n'.join(content_parts), image_urls, metadata
 
-    def _extract_components_v2_content_legacy(self, components_data: Union[str, List]) -> Tuple[str, List[str]]:
+    def _extract_components_v2_content_legacy(self, components_data: Union[str, bytes, List], payload_codec: int = CODEC_JSON) -> Tuple[str, List[str]]:
         content_parts = []
         image_urls = []
 
-        if isinstance(components_data, str):
+        if isinstance(components_data, (str, bytes)):
             try:
-                components = json.loads(components_data)
+                components = decode_payload(components_data, payload_codec)
             except:
                 return "", []
         else:
@@ -497,91 +641,355 @@ class BookmarksView:
         return '\n'.join(content_parts), image_urls
 
 
-class BookmarksPageView(discord.ui.View):
-    def __init__(self, db_manager: DatabaseManager, bookmark_options: List[discord.SelectOption], page: int, max_pages: int):
-        super().__init__(timeout=180)
-        self.db_manager = db_manager
+def _bookmarks_view(interaction: discord.Interaction) -> BookmarksView:
+    return interaction.client.get_cog("BookmarksCog").bookmarks_view
+
+
+async def _check_rate_limit(interaction: discord.Interaction) -> bool:
+    return await interaction.client.get_cog("BookmarksCog").check_rate_limit(interaction, "browse")
+
+
+def _detached(view: discord.ui.View) -> discord.ui.View:
+    # Interakcje trafiają do zarejestrowanych DynamicItemów, więc widok nie musi być trzymany w magazynie widoków.
+    view.stop()
+    return view
+
+
+class BookmarkPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bm:page:(?P<user_id>\d+):(?P<direction>prev|next):(?P<page>\d+):(?P<cursor>\d+)(?::f(?P<filter_id>\d+))?"):
+    def __init__(self, user_id: int, direction: str, page: int, cursor: int, disabled: bool = False,
+                 filter_id: Optional[int] = None):
+        custom_id = f"bm:page:{user_id}:{direction}:{page}:{cursor}"
+        if filter_id is not None:
+            # Pełne filtry nie mieszczą się w 100 znakach custom_id, więc przycisk niesie tylko ID zapisanego filtra.
+            custom_id += f":f{filter_id}"
+        super().__init__(
+            discord.ui.Button(
+                style=discord.ButtonStyle.secondary,
+                disabled=disabled,
+                emoji="◀️" if direction == "prev" else "▶️",
+                custom_id=custom_id
+            )
+        )
+        self.user_id = user_id
+        self.direction = direction
         self.page = page
-        self.max_pages = max_pages
+        self.cursor = cursor
+        self.filter_id = filter_id
 
-        if bookmark_options:
-            select_menu = BookmarkSelectMenu(db_manager, bookmark_options)
-            self.add_item(select_menu)
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        filter_id = int(match["filter_id"]) if match["filter_id"] else None
+        return cls(int(match["user_id"]), match["direction"], int(match["page"]), int(match["cursor"]), filter_id=filter_id)
 
-        prev_button = discord.ui.Button(
-            style=discord.ButtonStyle.secondary,
-            disabled=page <= 1,
-            emoji="◀️"
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("button:page")
+    async def callback(self, interaction: discord.Interaction):
+        if self.direction == "prev":
+            cursor = {"after_id": self.cursor}
+        else:
+            cursor = {"before_id": self.cursor}
+        bookmarks_view = _bookmarks_view(interaction)
+        filters = None
+        if self.filter_id is not None:
+            filters = await bookmarks_view.db_manager.get_list_filter(self.filter_id, interaction.user.id)
+        new_embed, new_view, _, _, _ = await bookmarks_view.create_bookmarks_page(
+            interaction.user.id, self.page, filters=filters, filter_id=self.filter_id, **cursor
         )
-        prev_button.callback = self.prev_callback
-        self.add_item(prev_button)
+        await interaction.response.edit_message(embed=new_embed, view=new_view)
+
 
-        next_button = discord.ui.Button(
-            style=discord.ButtonStyle.secondary,
-            disabled=page >= max_pages,
-            emoji="▶️"
+class BookmarkSearchButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bm:search:(?P<user_id>\d+):(?P<direction>prev|next):(?P<page>\d+):(?P<query>.+)"):
+    def __init__(self, user_id: int, direction: str, page: int, query: str, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                style=discord.ButtonStyle.secondary,
+                disabled=disabled,
+                emoji="◀️" if direction == "prev" else "▶️",
+                custom_id=f"bm:search:{user_id}:{direction}:{page}:{query}"
+            )
         )
-        next_button.callback = self.next_callback
-        self.add_item(next_button)
+        self.user_id = user_id
+        self.page = page
+        self.query = query
 
-    async def prev_callback(self, interaction: discord.Interaction):
-        new_page = self.page - 1
-        bookmarks_view = BookmarksView(self.db_manager)
-        new_embed, new_view, _, _, _ = await bookmarks_view.create_bookmarks_page(interaction.user.id, new_page)
-        await interaction.response.edit_message(embed=new_embed, view=new_view)
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["user_id"]), match["direction"], int(match["page"]), match["query"])
 
-    async def next_callback(self, interaction: discord.Interaction):
-        new_page = self.page + 1
-        bookmarks_view = BookmarksView(self.db_manager)
-        new_embed, new_view, _, _, _ = await bookmarks_view.create_bookmarks_page(interaction.user.id, new_page)
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("button:search")
+    async def callback(self, interaction: discord.Interaction):
+        new_embed, new_view, _, _, _ = await _bookmarks_view(interaction).create_search_page(interaction.user.id, self.query, self.page)
         await interaction.response.edit_message(embed=new_embed, view=new_view)
 
 
-class BookmarkSelectMenu(discord.ui.Select):
-    def __init__(self, db_manager: DatabaseManager, options: List[discord.SelectOption]):
+class BookmarkSelectMenu(discord.ui.DynamicItem[discord.ui.Select], template=r"bm:select:(?P<user_id>\d+)"):
+    def __init__(self, user_id: int, options: List[discord.SelectOption]):
         super().__init__(
-            placeholder="Wybierz zakładkę do wyświetlenia",
-            options=options,
-            custom_id="bookmark_select"
+            discord.ui.Select(
+                placeholder="Wybierz zakładkę do wyświetlenia",
+                options=options,
+                custom_id=f"bm:select:{user_id}"
+            )
         )
-        self.db_manager = db_manager
+        self.user_id = user_id
 
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(int(match["user_id"]), item.options)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("select:open")
     async def callback(self, interaction: discord.Interaction):
-        bookmark_id = int(self.values[0])
-        bookmark = self.db_manager.get_bookmark_by_id(bookmark_id, interaction.user.id)
+        await _bookmarks_view(interaction).send_bookmark_detail(interaction, int(self.item.values[0]))
 
-        if not bookmark:
+
+class BookmarkOpenButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bm:open:(?P<user_id>\d+):(?P<bookmark_id>\d+)"):
+    def __init__(self, user_id: int, bookmark_id: int):
+        super().__init__(
+            discord.ui.Button(
+                label="Wyświetl zakładkę",
+                style=discord.ButtonStyle.gray,
+                emoji="📖",
+                custom_id=f"bm:open:{user_id}:{bookmark_id}"
+            )
+        )
+        self.user_id = user_id
+        self.bookmark_id = bookmark_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["user_id"]), int(match["bookmark_id"]))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("button:open")
+    async def callback(self, interaction: discord.Interaction):
+        await _bookmarks_view(interaction).send_bookmark_detail(interaction, self.bookmark_id)
+
+
+class BookmarkDeleteButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bm:delete:(?P<user_id>\d+):(?P<bookmark_id>\d+)"):
+    def __init__(self, user_id: int, bookmark_id: int):
+        super().__init__(
+            discord.ui.Button(
+                style=discord.ButtonStyle.danger,
+                emoji="🗑️",
+                custom_id=f"bm:delete:{user_id}:{bookmark_id}"
+            )
+        )
+        self.user_id = user_id
+        self.bookmark_id = bookmark_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["user_id"]), int(match["bookmark_id"]))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("button:delete")
+    async def callback(self, interaction: discord.Interaction):
+        success, message = await _bookmarks_view(interaction).db_manager.delete_bookmark(self.bookmark_id, interaction.user.id)
+        if success:
+            await interaction.response.edit_message(
+                content="✅ Zakładka usunięta",
+                embeds=[],
+                view=None
+            )
+        else:
+            await interaction.response.send_message(message, ephemeral=True)
+
+
+class BookmarkBulkDeleteMenu(discord.ui.DynamicItem[discord.ui.Select], template=r"bm:bulkdelete:(?P<user_id>\d+)(?::f(?P<filter_id>\d+))?"):
+    def __init__(self, user_id: int, options: List[discord.SelectOption], filter_id: Optional[int] = None):
+        custom_id = f"bm:bulkdelete:{user_id}"
+        if filter_id is not None:
+            custom_id += f":f{filter_id}"
+        super().__init__(
+            discord.ui.Select(
+                placeholder="🗑️ Zaznacz zakładki do usunięcia",
+                min_values=1,
+                max_values=len(options),
+                options=options,
+                custom_id=custom_id
+            )
+        )
+        self.user_id = user_id
+        self.filter_id = filter_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        filter_id = int(match["filter_id"]) if match["filter_id"] else None
+        return cls(int(match["user_id"]), item.options, filter_id=filter_id)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("select:bulk_delete")
+    async def callback(self, interaction: discord.Interaction):
+        bookmarks_view = _bookmarks_view(interaction)
+        deleted = await bookmarks_view.db_manager.delete_bookmarks(map(int, self.item.values), interaction.user.id)
+        filters = None
+        if self.filter_id is not None:
+            filters = await bookmarks_view.db_manager.get_list_filter(self.filter_id, interaction.user.id)
+        new_embed, new_view, _, _, _ = await bookmarks_view.create_bookmarks_page(
+            interaction.user.id, 1, filters=filters, filter_id=self.filter_id
+        )
+        await interaction.response.edit_message(
+            content=f"✅ Usunięto zakładki: {deleted}",
+            embed=new_embed,
+            view=new_view
+        )
+
+
+class BookmarkTagsModal(discord.ui.Modal, title="🏷️ Tagi zakładki"):
+    def __init__(self, db_manager: DatabaseManager, bookmark_id: int, tags: List[str]):
+        # Bez limitu czasu zamknięty formularz zostaje w magazynie widoków discord.py do końca działania procesu.
+        super().__init__(timeout=MODAL_TIMEOUT)
+        self.db_manager = db_manager
+        self.bookmark_id = bookmark_id
+        self.tags_input = discord.ui.TextInput(
+            label="Tagi oddzielone przecinkami",
+            placeholder="np. przepisy, do przeczytania",
+            default=", ".join(tags),
+            required=False,
+            max_length=400
+        )
+        self.add_item(self.tags_input)
+
+    @metrics.instrumented("modal:tags")
+    async def on_submit(self, interaction: discord.Interaction):
+        tags = await self.db_manager.set_bookmark_tags(self.bookmark_id, interaction.user.id, self.tags_input.value.split(","))
+        if tags is None:
+            message = "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu."
+        elif tags:
+            message = f"🏷️ Tagi zakładki #{self.bookmark_id}: {', '.join(tags)}"
+        else:
+            message = f"🏷️ Usunięto tagi zakładki #{self.bookmark_id}."
+        await interaction.response.send_message(message, ephemeral=True)
+
+
+class BookmarkTagsButton(discord.ui.DynamicItem[discord.ui.Button], template=r"bm:tags:(?P<user_id>\d+):(?P<bookmark_id>\d+)"):
+    def __init__(self, user_id: int, bookmark_id: int):
+        super().__init__(
+            discord.ui.Button(
+                label="Tagi",
+                style=discord.ButtonStyle.gray,
+                emoji="🏷️",
+                custom_id=f"bm:tags:{user_id}:{bookmark_id}"
+            )
+        )
+        self.user_id = user_id
+        self.bookmark_id = bookmark_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match["user_id"]), int(match["bookmark_id"]))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("button:tags")
+    async def callback(self, interaction: discord.Interaction):
+        db_manager = _bookmarks_view(interaction).db_manager
+        tags = await db_manager.get_bookmark_tags(self.bookmark_id, interaction.user.id)
+        if tags is None:
             await interaction.response.send_message(
                 "Nie znaleziono zakładki o podanym ID lub nie masz do niej dostępu.",
                 ephemeral=True
             )
             return
+        await interaction.response.send_modal(BookmarkTagsModal(db_manager, self.bookmark_id, tags))
 
-        bookmarks_view = BookmarksView(self.db_manager)
-        embed, additional_embeds, link_data = bookmarks_view.create_bookmark_detail_embed(bookmark)
-        all_embeds = [embed] + additional_embeds
 
-        view = BookmarkDetailView(self.db_manager, bookmark_id, link_data)
-        await interaction.response.send_message(
-            embeds=all_embeds,
-            view=view,
-            ephemeral=True
+REMINDER_DELAYS = (
+    ("Za godzinę", 3600),
+    ("Za 3 godziny", 3 * 3600),
+    ("Jutro o tej porze", 24 * 3600),
+    ("Za 3 dni", 3 * 24 * 3600),
+    ("Za tydzień", 7 * 24 * 3600)
+)
+
+
+class BookmarkRemindMenu(discord.ui.DynamicItem[discord.ui.Select], template=r"bm:remind:(?P<user_id>\d+):(?P<bookmark_id>\d+)"):
+    def __init__(self, user_id: int, bookmark_id: int):
+        super().__init__(
+            discord.ui.Select(
+                placeholder="⏰ Przypomnij mi o tej zakładce",
+                options=[discord.SelectOption(label=label, value=str(delay)) for label, delay in REMINDER_DELAYS],
+                custom_id=f"bm:remind:{user_id}:{bookmark_id}"
+            )
         )
+        self.user_id = user_id
+        self.bookmark_id = bookmark_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match):
+        return cls(int(match["user_id"]), int(match["bookmark_id"]))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id and await _check_rate_limit(interaction)
+
+    @metrics.instrumented("select:remind")
+    async def callback(self, interaction: discord.Interaction):
+        _, message = await interaction.client.get_cog("BookmarksCog").schedule_reminder(
+            interaction.user.id, self.bookmark_id, int(self.item.values[0])
+        )
+        await interaction.response.send_message(message, ephemeral=True)
+
+
+DYNAMIC_ITEMS = (
+    BookmarkPageButton,
+    BookmarkSearchButton,
+    BookmarkSelectMenu,
+    BookmarkBulkDeleteMenu,
+    BookmarkOpenButton,
+    BookmarkDeleteButton,
+    BookmarkRemindMenu,
+    BookmarkTagsButton
+)
+
+
+class BookmarksPageView(discord.ui.View):
+    def __init__(self, user_id: int, bookmark_options: List[discord.SelectOption], page: int, max_pages: int,
+                 first_id: int, last_id: int, filter_id: Optional[int] = None):
+        super().__init__(timeout=None)
+
+        if bookmark_options:
+            self.add_item(BookmarkSelectMenu(user_id, bookmark_options))
+            self.add_item(BookmarkBulkDeleteMenu(user_id, bookmark_options, filter_id=filter_id))
+
+        self.add_item(BookmarkPageButton(user_id, "prev", page - 1, first_id, disabled=page <= 1, filter_id=filter_id))
+        self.add_item(BookmarkPageButton(user_id, "next", page + 1, last_id, disabled=page >= max_pages, filter_id=filter_id))
+        _detached(self)
+
+
+class BookmarkSearchView(discord.ui.View):
+    def __init__(self, user_id: int, bookmark_options: List[discord.SelectOption], query: str, page: int, max_pages: int):
+        super().__init__(timeout=None)
+
+        if bookmark_options:
+            self.add_item(BookmarkSelectMenu(user_id, bookmark_options))
+
+        self.add_item(BookmarkSearchButton(user_id, "prev", page - 1, query, disabled=page <= 1))
+        self.add_item(BookmarkSearchButton(user_id, "next", page + 1, query, disabled=page >= max_pages))
+        _detached(self)
 
 
 class BookmarkDetailView(discord.ui.View):
-    def __init__(self, db_manager: DatabaseManager, bookmark_id: int, link_data: List[str]):
-        super().__init__(timeout=180)
-        self.db_manager = db_manager
-        self.bookmark_id = bookmark_id
+    def __init__(self, user_id: int, bookmark_id: int, link_data: List[int]):
+        super().__init__(timeout=None)
         self.guild_id, self.channel_id, self.message_id = link_data
 
-        delete_button = discord.ui.Button(
-            style=discord.ButtonStyle.danger,
-            emoji="🗑️"
-        )
-        delete_button.callback = self.delete_callback
-        self.add_item(delete_button)
+        self.add_item(BookmarkDeleteButton(user_id, bookmark_id))
+        self.add_item(BookmarkTagsButton(user_id, bookmark_id))
 
         link_button = discord.ui.Button(
             style=discord.ButtonStyle.link,
@@ -589,14 +997,15 @@ class BookmarkDetailView(discord.ui.View):
             url=f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.message_id}"
         )
         self.add_item(link_button)
-
-    async def delete_callback(self, interaction: discord.Interaction):
-        success, message = self.db_manager.delete_bookmark(self.bookmark_id, interaction.user.id)
-        if success:
-            await interaction.response.edit_message(
-                content="✅ Zakładka usunięta",
-                embeds=[],
-                view=None
-            )
-        else:
-            await interaction.response.send_message(message, ephemeral=True)
+        self.add_item(BookmarkRemindMenu(user_id, bookmark_id))
+        _detached(self)
+
+
+class ViewBookmarkButton(discord.ui.View):
+    def __init__(self, user_id: int, bookmark_id: int, remind: bool = True):
+        super().__init__(timeout=None)
+        self.add_item(BookmarkOpenButton(user_id, bookmark_id))
+        self.add_item(BookmarkTagsButton(user_id, bookmark_id))
+        if remind:
+            self.add_item(BookmarkRemindMenu(user_id, bookmark_id))
+        _detached(self)
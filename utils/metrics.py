@@ -0,0 +1,165 @@
+import asyncio
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+BUCKET_BOUNDS = tuple(0.0005 * 2 ** i for i in range(18))
+
+PHASES = ("total", "db", "render", "discord")
+
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]
+
+_current_phases: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("metrics_phases", default=None)
+_null_timer = contextlib.nullcontext()
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else lower * 2
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKET_BOUNDS[-1]
+
+
+class _PhaseTimer:
+    __slots__ = ("phases", "phase", "start")
+
+    def __init__(self, phases: Dict[str, float], phase: str):
+        self.phases = phases
+        self.phase = phase
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.phases[self.phase] = self.phases.get(self.phase, 0.0) + time.perf_counter() - self.start
+
+
+class Metrics:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.collectors: List[Collector] = []
+
+    def timed(self, phase: str):
+        phases = _current_phases.get()
+        if phases is None:
+            return _null_timer
+        return _PhaseTimer(phases, phase)
+
+    def detach(self) -> None:
+        _current_phases.set(None)
+
+    def instrumented(self, name: str) -> Callable:
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+
+                phases: Dict[str, float] = {}
+                token = _current_phases.set(phases)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _current_phases.reset(token)
+                    self._record(name, time.perf_counter() - start, phases)
+            return wrapper
+        return decorator
+
+    def _record(self, name: str, total: float, phases: Dict[str, float]) -> None:
+        # Handlery korzystają tylko z bazy, renderowania i API Discorda, więc pozostały czas przypada na Discorda.
+        phases["discord"] = max(0.0, total - phases.get("db", 0.0) - phases.get("render", 0.0))
+        phases["total"] = total
+        for phase, value in phases.items():
+            histogram = self.histograms.get((name, phase))
+            if histogram is None:
+                histogram = self.histograms[(name, phase)] = Histogram()
+            histogram.observe(value)
+
+    def register_collector(self, collector: Collector) -> None:
+        self.collectors.append(collector)
+
+    def unregister_collector(self, collector: Collector) -> None:
+        if collector in self.collectors:
+            self.collectors.remove(collector)
+
+    def summary(self) -> Dict[str, Dict[str, Tuple[int, float, float, float]]]:
+        result: Dict[str, Dict[str, Tuple[int, float, float, float]]] = {}
+        for (name, phase), histogram in sorted(self.histograms.items()):
+            result.setdefault(name, {})[phase] = (
+                histogram.count,
+                histogram.quantile(0.5),
+                histogram.quantile(0.95),
+                histogram.quantile(0.99)
+            )
+        return result
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP bookmarks_operation_seconds Czas obsługi komend i callbacków widoków",
+            "# TYPE bookmarks_operation_seconds histogram"
+        ]
+        for (name, phase), histogram in sorted(self.histograms.items()):
+            labels = f'operation="{name}",phase="{phase}"'
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, histogram.counts):
+                cumulative += count
+                lines.append(f'bookmarks_operation_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'bookmarks_operation_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"bookmarks_operation_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"bookmarks_operation_seconds_count{{{labels}}} {histogram.count}")
+
+        for collector in self.collectors:
+            for metric, labels, value in collector():
+                label_text = ",".join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"{metric}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+                body = self.render_prometheus().encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    + f"Content-Length: {len(body)}\r\n".encode()
+                    + b"Connection: close\r\n\r\n"
+                    + body
+                )
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+
+metrics = Metrics(enabled=os.getenv("metrics", "1") != "0")
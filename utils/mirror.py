@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import aiohttp
+
+from database.blobs import BlobStore
+from database.manager import DatabaseManager, attachment_url_key
+
+CDN_HOSTS = ("cdn.discordapp.com", "media.discordapp.net")
+
+
+class MirrorJob(NamedTuple):
+    url: str
+    filename: str
+    content_type: Optional[str]
+    size: int
+
+
+def cdn_url_expired(url: str, now: Optional[float] = None) -> bool:
+    parts = urlsplit(url)
+    if parts.hostname not in CDN_HOSTS or not parts.path.startswith(("/attachments/", "/ephemeral-attachments/")):
+        return False
+
+    expires = parse_qs(parts.query).get("ex")
+    if not expires:
+        return True
+    try:
+        return int(expires[0], 16) <= (now if now is not None else time.time())
+    except ValueError:
+        return True
+
+
+class AttachmentMirror:
+    def __init__(self, db_manager: DatabaseManager, store: BlobStore, workers: int = 4, queue_size: int = 1000,
+                 max_file_bytes: int = 8 * 1024 * 1024, session_factory: Optional[Callable[[], aiohttp.ClientSession]] = None):
+        self.db_manager = db_manager
+        self.store = store
+        self.workers = workers
+        self.max_file_bytes = max_file_bytes
+        self.session_factory = session_factory or self._default_session
+        self.mirrored = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _default_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.workers, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=60, sock_connect=10)
+        )
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._session = self.session_factory()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def submit(self, attachments: Iterable) -> None:
+        for attachment in attachments:
+            job = MirrorJob(
+                attachment.url,
+                attachment.filename,
+                getattr(attachment, "content_type", None),
+                getattr(attachment, "size", 0) or 0
+            )
+            if job.size > self.max_file_bytes:
+                self.skipped += 1
+                continue
+            try:
+                self._queue.put_nowait(job)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._mirror(job)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as e:
+                self.failed += 1
+                print(f"Błąd kopiowania załącznika {job.filename}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _mirror(self, job: MirrorJob) -> None:
+        url_key = attachment_url_key(job.url)
+        existing = await self.db_manager.get_attachment_mirrors([url_key])
+        if url_key in existing and existing[url_key][0] in self.store:
+            self.skipped += 1
+            return
+
+        async with self._session.get(job.url) as response:
+            response.raise_for_status()
+            if (response.content_length or 0) > self.max_file_bytes:
+                self.skipped += 1
+                return
+            data = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                data.extend(chunk)
+                if len(data) > self.max_file_bytes:
+                    self.skipped += 1
+                    return
+
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(None, self.store.put, bytes(data))
+        await self.db_manager.save_attachment_mirror(url_key, digest, job.filename, job.content_type, len(data))
+        self.mirrored += 1
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "mirrored": self.mirrored,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            **self.store.stats()
+        }
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+
+class RateLimit(NamedTuple):
+    capacity: float
+    per_seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+def parse_rate_limits(value: str) -> Tuple[RateLimit, ...]:
+    # Format: "pojemność/sekundy" dla każdego zakresu, rozdzielone przecinkami, np. "5/10,600/10,2000/10".
+    limits = []
+    for part in value.split(","):
+        capacity, _, per_seconds = part.strip().partition("/")
+        limit = RateLimit(float(capacity), float(per_seconds))
+        if limit.capacity <= 0 or limit.per_seconds <= 0:
+            raise ValueError(f"Nieprawidłowy limit zapytań: {part!r}")
+        limits.append(limit)
+    return tuple(limits)
+
+
+class TokenBucketLimiter:
+    def __init__(self, limit: RateLimit, max_buckets: int = 10000):
+        self.capacity = limit.capacity
+        self.rate = limit.rate
+        self.max_buckets = max_buckets
+        self.idle_after = limit.per_seconds
+        self.allowed = 0
+        self.throttled = 0
+        self.evictions = 0
+        self._buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, key: Hashable, cost: float = 1.0, now: Optional[float] = None) -> float:
+        if now is None:
+            now = time.monotonic()
+        self._evict_idle(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            self.allowed += 1
+            return 0.0
+
+        self.throttled += 1
+        return (cost - bucket[0]) / self.rate
+
+    def refund(self, key: Hashable, cost: float = 1.0) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.capacity, bucket[0] + cost)
+            self.allowed -= 1
+
+    def _evict_idle(self, now: float) -> None:
+        # Kubełek nieużywany przez pełne okno uzupełniania jest nieodróżnialny od nowego.
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.idle_after:
+                break
+            del self._buckets[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buckets": len(self._buckets),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "evictions": self.evictions
+        }
+
+
+class RateLimiter:
+    def __init__(self, user: RateLimit, guild: RateLimit, global_: RateLimit, max_buckets: int = 10000):
+        self.scopes: Tuple[Tuple[str, TokenBucketLimiter], ...] = (
+            ("user", TokenBucketLimiter(user, max_buckets)),
+            ("guild", TokenBucketLimiter(guild, max_buckets)),
+            ("global", TokenBucketLimiter(global_, 1))
+        )
+
+    def hit(self, user_id: int, guild_id: Optional[int]) -> float:
+        now = time.monotonic()
+        keys = (user_id, guild_id, None)
+        acquired = []
+        for (scope, limiter), key in zip(self.scopes, keys):
+            if scope == "guild" and key is None:
+                continue
+            retry_after = limiter.hit(key, now=now)
+            if retry_after:
+                for previous, previous_key in acquired:
+                    previous.refund(previous_key)
+                return retry_after
+            acquired.append((limiter, key))
+        return 0.0
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {scope: limiter.stats() for scope, limiter in self.scopes}
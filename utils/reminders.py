@@ -0,0 +1,114 @@
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from database.manager import DatabaseManager
+from database.models import Reminder
+from utils.metrics import metrics
+
+
+class ReminderScheduler:
+    def __init__(self, db_manager: DatabaseManager, dispatch: Callable[[Reminder], Awaitable[None]],
+                 window: float = 300.0, window_size: int = 10000, concurrency: int = 8, claim_batch: int = 100):
+        self.db_manager = db_manager
+        self.dispatch = dispatch
+        self.window = window
+        self.window_size = window_size
+        self.claim_batch = claim_batch
+        self.refills = 0
+        self.dispatched = 0
+        self.skipped = 0
+        self.failed = 0
+        # Kopiec trzyma tylko przypomnienia do horyzontu, reszta czeka w tabeli na kolejne okno.
+        self._heap: List[Tuple[float, int, Reminder]] = []
+        self._horizon = 0.0
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._sending: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def schedule(self, reminder: Reminder) -> None:
+        if reminder.due_at <= self._horizon:
+            heapq.heappush(self._heap, (reminder.due_at, reminder.id, reminder))
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        metrics.detach()
+        while True:
+            now = time.time()
+            if now >= self._horizon:
+                try:
+                    await self._refill(now)
+                except self.db_manager.backend.errors as e:
+                    print(f"Błąd wczytywania przypomnień: {e}")
+                    await asyncio.sleep(min(self.window, 30.0))
+                    continue
+
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+            for start in range(0, len(due), self.claim_batch):
+                await self._dispatch_batch(due[start:start + self.claim_batch])
+
+            next_at = min(self._heap[0][0], self._horizon) if self._heap else self._horizon
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, next_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refill(self, now: float) -> None:
+        reminders = await self.db_manager.get_upcoming_reminders(now + self.window, self.window_size)
+        self._heap = [(reminder.due_at, reminder.id, reminder) for reminder in reminders]
+        heapq.heapify(self._heap)
+        # Przy pełnym oknie horyzont kończy się na ostatnim wczytanym terminie, żeby nic nie zostało pominięte.
+        self._horizon = reminders[-1].due_at if len(reminders) == self.window_size else now + self.window
+        self.refills += 1
+
+    async def _dispatch_batch(self, reminders: List[Reminder]) -> None:
+        try:
+            claimed = await self.db_manager.claim_reminders(reminders)
+        except self.db_manager.backend.errors as e:
+            print(f"Błąd rezerwowania przypomnień: {e}")
+            self._horizon = 0.0
+            return
+
+        self.skipped += len(reminders) - len(claimed)
+        for reminder in claimed:
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._send(reminder))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, reminder: Reminder) -> None:
+        try:
+            await self.dispatch(reminder)
+            self.dispatched += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Błąd wysyłania przypomnienia #{reminder.id}: {e}")
+        finally:
+            self._semaphore.release()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._heap),
+            "refills": self.refills,
+            "dispatched": self.dispatched,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "sending": len(self._sending)
+        }
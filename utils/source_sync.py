@@ -0,0 +1,112 @@
+import asyncio
+import traceback
+from typing import Any, Dict, Iterable, Optional, Set
+
+from database.manager import DatabaseManager
+from utils.metrics import metrics
+
+
+class SourceMessageSync:
+    def __init__(self, db_manager: DatabaseManager, delay: float = 2.0, max_pending: int = 500,
+                 track_edits: bool = True):
+        self.db_manager = db_manager
+        self.delay = delay
+        self.max_pending = max_pending
+        self.track_edits = track_edits
+        self.events = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.updated = 0
+        self.marked = 0
+        self.failed = 0
+        self._edits: Dict[int, Dict[str, Any]] = {}
+        self._deleted: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def message_edited(self, message_id: int, data: Dict[str, Any]) -> None:
+        if not self.track_edits or message_id in self._deleted:
+            return
+        pending = self._edits.get(message_id)
+        if pending is None:
+            self._edits[message_id] = dict(data)
+        else:
+            # Zdarzenia edycji mogą być częściowe (np. samo rozwinięcie embedów), więc pola są nakładane.
+            pending.update(data)
+            self.coalesced += 1
+        self._notify()
+
+    def messages_deleted(self, message_ids: Iterable[int]) -> None:
+        for message_id in message_ids:
+            self._edits.pop(message_id, None)
+            self._deleted.add(message_id)
+        self._notify()
+
+    def _notify(self) -> None:
+        self.events += 1
+        self._wakeup.set()
+
+    def _pending(self) -> int:
+        return len(self._edits) + len(self._deleted)
+
+    async def _run(self) -> None:
+        metrics.detach()
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            deadline = loop.time() + self.delay
+            while self._pending() < self.max_pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        edits, deleted = self._edits, self._deleted
+        if not edits and not deleted:
+            return
+        self._edits, self._deleted = {}, set()
+
+        try:
+            updated, marked = await self.db_manager.apply_source_changes(edits, deleted)
+        except self.db_manager.backend.errors as e:
+            self.failed += 1
+            print(f"Błąd synchronizacji zakładek z wiadomościami źródłowymi: {e}")
+            return
+        except Exception as e:
+            # Nieoczekiwany błąd nie może zatrzymać zadania synchronizacji; tracona jest tylko ta partia.
+            self.failed += 1
+            print(f"Nieoczekiwany błąd synchronizacji zakładek z wiadomościami źródłowymi: {e}")
+            traceback.print_exception(type(e), e, e.__traceback__)
+            return
+        self.flushes += 1
+        self.updated += updated
+        self.marked += marked
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self._pending(),
+            "events": self.events,
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "updated": self.updated,
+            "marked": self.marked,
+            "failed": self.failed
+        }